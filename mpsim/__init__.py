@@ -0,0 +1 @@
+"""Python tooling for driving the MP voting contracts on a local node."""
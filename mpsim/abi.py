@@ -0,0 +1,179 @@
+"""Generic Solidity ABI encoding and decoding.
+
+Types are written as in function signatures: ``uint256``, ``address``,
+``bool``, ``bytes32``, ``string``, ``bytes``, arrays such as ``uint256[]`` or
+``string[]``, and tuples such as ``(string,uint256)``.
+"""
+from functools import lru_cache
+
+from .keccak import keccak256
+
+
+@lru_cache(maxsize=None)
+def selector(signature):
+    return keccak256(signature)[:4]
+
+
+@lru_cache(maxsize=None)
+def event_topic(signature):
+    return "0x" + keccak256(signature).hex()
+
+
+def _split_tuple(t):
+    inner, parts, depth, start = t[1:-1], [], 0, 0
+    for i, ch in enumerate(inner):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(inner[start:i])
+            start = i + 1
+    if inner:
+        parts.append(inner[start:])
+    return parts
+
+
+def _array(t):
+    """Split ``T[]``/``T[k]`` into (T, k or None); returns None for non-arrays."""
+    if not t.endswith("]"):
+        return None
+    base, _, size = t[:-1].rpartition("[")
+    return base, int(size) if size else None
+
+
+def is_dynamic(t):
+    if t in ("string", "bytes"):
+        return True
+    arr = _array(t)
+    if arr:
+        return arr[1] is None or is_dynamic(arr[0])
+    if t.startswith("("):
+        return any(is_dynamic(p) for p in _split_tuple(t))
+    return False
+
+
+def head_size(t):
+    if is_dynamic(t):
+        return 32
+    arr = _array(t)
+    if arr:
+        return arr[1] * head_size(arr[0])
+    if t.startswith("("):
+        return sum(head_size(p) for p in _split_tuple(t))
+    return 32
+
+
+def _encode_static(t, v):
+    if t == "address":
+        return bytes(12) + bytes.fromhex(v[2:] if v.startswith("0x") else v)
+    if t == "bool":
+        return (1 if v else 0).to_bytes(32, "big")
+    if t.startswith("uint"):
+        return int(v).to_bytes(32, "big")
+    if t.startswith("int"):
+        return int(v).to_bytes(32, "big", signed=True)
+    if t.startswith("bytes"):
+        return bytes(v).ljust(32, b"\x00")
+    raise ValueError(f"unsupported ABI type {t}")
+
+
+def _encode_seq(types, values):
+    heads, tails = [], []
+    offset = sum(head_size(t) for t in types)
+    for t, v in zip(types, values):
+        if is_dynamic(t):
+            heads.append(offset.to_bytes(32, "big"))
+            tail = encode_value(t, v)
+            tails.append(tail)
+            offset += len(tail)
+        else:
+            heads.append(encode_value(t, v))
+    return b"".join(heads) + b"".join(tails)
+
+
+def encode_value(t, v):
+    if t in ("string", "bytes"):
+        data = v.encode() if isinstance(v, str) else bytes(v)
+        return len(data).to_bytes(32, "big") + data + bytes(-len(data) % 32)
+    arr = _array(t)
+    if arr:
+        base, size = arr
+        body = _encode_seq([base] * len(v), v)
+        return body if size is not None else len(v).to_bytes(32, "big") + body
+    if t.startswith("("):
+        return _encode_seq(_split_tuple(t), v)
+    return _encode_static(t, v)
+
+
+def encode(types, values):
+    return _encode_seq(list(types), list(values))
+
+
+def encode_call(signature, *args):
+    """Calldata for ``signature`` (e.g. ``"vote(uint256,uint256)"``) as a 0x-prefixed hex string."""
+    types = _split_tuple(signature[signature.index("("):])
+    return "0x" + (selector(signature) + encode(types, args)).hex()
+
+
+def _word(data, pos):
+    return int.from_bytes(data[pos:pos + 32], "big")
+
+
+def decode_value(t, data, pos):
+    """Decode ``t`` whose head starts at ``pos`` within ``data``."""
+    if is_dynamic(t):
+        pos = _word(data, pos)
+        if t in ("string", "bytes"):
+            raw = bytes(data[pos + 32:pos + 32 + _word(data, pos)])
+            return raw.decode() if t == "string" else raw
+    arr = _array(t)
+    if arr:
+        base, size = arr
+        if size is None:
+            size, pos = _word(data, pos), pos + 32
+        return _decode_seq([base] * size, data, pos)
+    if t.startswith("("):
+        return tuple(_decode_seq(_split_tuple(t), data, pos))
+    if t == "address":
+        return "0x" + bytes(data[pos + 12:pos + 32]).hex()
+    if t == "bool":
+        return _word(data, pos) != 0
+    if t.startswith("uint"):
+        return _word(data, pos)
+    if t.startswith("int"):
+        return int.from_bytes(data[pos:pos + 32], "big", signed=True)
+    if t.startswith("bytes"):
+        return bytes(data[pos:pos + int(t[5:])])
+    raise ValueError(f"unsupported ABI type {t}")
+
+
+def _decode_seq(types, data, base):
+    values, pos = [], base
+    for t in types:
+        if is_dynamic(t):
+            # offsets in a sequence are relative to the start of that sequence
+            values.append(decode_value(t, data[base:], pos - base))
+        else:
+            values.append(decode_value(t, data, pos))
+        pos += head_size(t)
+    return values
+
+
+def decode(types, data):
+    """Decode return data (bytes or 0x-hex) into a list of Python values."""
+    if isinstance(data, str):
+        data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    return _decode_seq(list(types), data, 0)
+
+
+ERROR_SELECTOR = selector("Error(string)")
+
+
+def revert_reason(data):
+    """Extract the ``require`` message from revert data, or None."""
+    if isinstance(data, str):
+        data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    if data[:4] != ERROR_SELECTOR:
+        return None
+    return decode(["string"], data[4:])[0]
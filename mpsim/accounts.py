@@ -0,0 +1,155 @@
+"""Derive, cache, fund and mint MP accounts for large simulated chambers.
+
+Keys come from ``sha256(seed || index)``, so the same seed always gives the
+same chamber. Keys and addresses are cached in a JSON file; a restart only
+derives accounts beyond what the cache already holds.
+
+Funding is one JSON-RPC batch of ``anvil_setBalance`` on anvil. Other nodes
+get the ETH from ``funder`` (an unlocked account) through ``src/Disperse.sol``,
+one ``disperseEther`` transaction per block's worth of recipients::
+
+    python -m mpsim.accounts --count 2000 --ether 1000
+    python -m mpsim.accounts --count 2000 --voting $VOTING_ADDRESS   # also mint MP tokens
+
+Note that ``MPVoting.isValidMPVoter`` walks every MP token, so the gas of a
+vote grows with the size of the chamber.
+"""
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from . import codegen, rpc
+from .config import ADMIN_ADDRESS, RPC_URL
+from .secp256k1 import N, to_address
+
+DEFAULT_SEED = "mpsim"
+CACHE_PATH = Path(".mp_accounts.json")
+DEFAULT_ETHER = 1000
+DISPERSE_GAS_PER_RECIPIENT = 40_000
+FOUR_YEARS = 4 * 365 * 24 * 3600
+PARTIES = ["Conservative", "Labour", "Liberal Democrats", "Scottish National Party", "Green Party", "Independent"]
+
+
+def derive_key(seed, index):
+    digest = hashlib.sha256(seed.encode() + index.to_bytes(32, "big")).digest()
+    return int.from_bytes(digest, "big") % (N - 1) + 1
+
+
+def derive(seed, start, count):
+    """``[key, address]`` pairs for accounts ``start`` .. ``start + count - 1``."""
+    out = []
+    for i in range(start, start + count):
+        key = derive_key(seed, i)
+        out.append([f"0x{key:064x}", to_address(key)])
+    return out
+
+
+def load(count, seed=DEFAULT_SEED, path=CACHE_PATH):
+    """``count`` accounts as ``(key, address, label)``, read from and extending the cache."""
+    path = Path(path)
+    cached = []
+    if path.exists():
+        data = json.loads(path.read_text())
+        if data.get("seed") == seed:
+            cached = data["accounts"]
+    if len(cached) < count:
+        cached += derive(seed, len(cached), count - len(cached))
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(json.dumps({"seed": seed, "accounts": cached}))
+        os.replace(tmp, path)
+    return [(key, address, f"Sim-MP-{i + 1}") for i, (key, address) in enumerate(cached[:count])]
+
+
+def is_anvil(client):
+    return client.call("web3_clientVersion").lower().startswith("anvil")
+
+
+def fund(client, addresses, amount_wei, funder=ADMIN_ADDRESS, disperse=None):
+    """Give every address ``amount_wei``; returns the number of accounts that were funded."""
+    if is_anvil(client):
+        for r in client.batch([("anvil_setBalance", [a, hex(amount_wei)]) for a in addresses]):
+            if isinstance(r, rpc.RPCError):
+                raise r
+        return len(addresses)
+
+    balances = client.batch([("eth_getBalance", [a, "latest"]) for a in addresses])
+    needy = [a for a, b in zip(addresses, balances) if isinstance(b, rpc.RPCError) or int(b, 16) < amount_wei]
+    if not needy:
+        return 0
+    bindings = codegen.load()
+    if disperse is None:
+        disperse = deploy_disperse(client, funder)
+    block = client.call("eth_getBlockByNumber", "latest", False)
+    per_tx = max(1, int(int(block["gasLimit"], 16) * 0.9) // DISPERSE_GAS_PER_RECIPIENT)
+    rpc.send_all(client, [
+        {"from": funder, "to": disperse, "value": hex(amount_wei * len(chunk)),
+         "gas": hex(DISPERSE_GAS_PER_RECIPIENT * len(chunk) + 50_000),
+         "data": bindings.Disperse.disperseEther(chunk, amount_wei)}
+        for chunk in (needy[i:i + per_tx] for i in range(0, len(needy), per_tx))
+    ])
+    return len(needy)
+
+
+def deploy_disperse(client, funder=ADMIN_ADDRESS):
+    artifact = json.loads((codegen.OUT_DIR / "Disperse.sol" / "Disperse.json").read_text())
+    tx_hash = client.call("eth_sendTransaction", {"from": funder, "data": artifact["bytecode"]["object"]})
+    return rpc.wait_for_receipt(client, tx_hash)["contractAddress"]
+
+
+def mint(client, voting, addresses):
+    """Mint an MP token (through the factory, as admin) for every address that has none."""
+    b = codegen.load()
+    mp = b.MPVoting
+    factory = mp.decode_mpTokenFactory(client.call("eth_call", {"to": voting, "data": mp.mpTokenFactory()}, "latest"))
+    token = mp.decode_mpToken(client.call("eth_call", {"to": voting, "data": mp.mpToken()}, "latest"))
+    balances = client.batch([("eth_call", [{"to": token, "data": b.MPToken.balanceOf(a)}, "latest"]) for a in addresses])
+    missing = [(i, a) for i, (a, r) in enumerate(zip(addresses, balances)) if b.MPToken.decode_balanceOf(r) == 0]
+    if not missing:
+        return 0
+    now = int(client.call("eth_getBlockByNumber", "latest", False)["timestamp"], 16)
+    rpc.send_all(client, [
+        {"from": ADMIN_ADDRESS, "to": factory,
+         "data": b.MPTokenFactory.createMPToken(
+             a, f"Simulated MP {i + 1}", PARTIES[i % len(PARTIES)], f"Constituency {i + 1}", 2024, now + FOUR_YEARS)}
+        for i, a in missing
+    ])
+    return len(missing)
+
+
+def provision(client, count, voting=None, ether=DEFAULT_ETHER, seed=DEFAULT_SEED, path=CACHE_PATH):
+    """Load ``count`` accounts, fund them and, given ``voting``, make sure each holds an MP token."""
+    accounts = load(count, seed, path)
+    addresses = [address for _, address, _ in accounts]
+    fund(client, addresses, ether * 10**18)
+    if voting:
+        mint(client, voting, addresses)
+    return accounts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision funded MP accounts for simulations")
+    parser.add_argument("--rpc-url", default=RPC_URL)
+    parser.add_argument("--count", type=int, default=100, help="number of accounts")
+    parser.add_argument("--ether", type=int, default=DEFAULT_ETHER, help="balance per account in ETH (default: %(default)s)")
+    parser.add_argument("--seed", default=DEFAULT_SEED)
+    parser.add_argument("--cache", default=str(CACHE_PATH), help="key cache (default: %(default)s)")
+    parser.add_argument("--funder", default=ADMIN_ADDRESS, help="unlocked account paying for disperse on non-anvil nodes")
+    parser.add_argument("--disperse", help="existing Disperse contract to use instead of deploying one")
+    parser.add_argument("--voting", default=os.environ.get("VOTING_ADDRESS"), help="also mint MP tokens for this MPVoting")
+    args = parser.parse_args()
+
+    client = rpc.Client(args.rpc_url)
+    accounts = load(args.count, args.seed, args.cache)
+    addresses = [address for _, address, _ in accounts]
+    print(f"{len(accounts)} accounts from {args.cache}")
+    funded = fund(client, addresses, args.ether * 10**18, args.funder, args.disperse)
+    print(f"Funded {funded} accounts with {args.ether} ETH")
+    if args.voting:
+        print(f"Minted {mint(client, args.voting, addresses)} MP tokens")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Microbenchmarks: :mod:`mpsim.fastdecode` against the generic :mod:`mpsim.abi` decoder.
+
+Payloads are synthetic but shaped like MPVoting's real return data::
+
+    python -m mpsim.bench_decode
+    python -m mpsim.bench_decode --n 10000 --numpy
+"""
+import argparse
+import timeit
+
+from . import abi, fastdecode
+
+DETAILS_TYPES = ["string", "string[]", "uint256", "uint256", "bool", "uint256", "address", "uint256", "uint256"]
+VOTE_CAST_TOPIC = abi.event_topic("VoteCast(uint256,address,uint256,uint256)")
+
+
+def payloads(n):
+    details = abi.encode(DETAILS_TYPES, [
+        "Environmental protection bill?", ["Yes", "No", "Abstain"],
+        1_700_000_000, 1_700_000_500, False, 650, "0x" + "f3" * 20, 650 * 10**20, 1,
+    ])
+    counts = abi.encode(["uint256[]"], [[312, 301, 37]])
+    big_counts = abi.encode(["uint256[]"], [list(range(n))])
+    logs = [
+        {
+            "topics": [VOTE_CAST_TOPIC, "0x" + (1 + i // 650).to_bytes(32, "big").hex(), "0x" + bytes(12).hex() + (i % 650).to_bytes(20, "big").hex()],
+            "data": "0x" + abi.encode(["uint256", "uint256"], [i % 3, 10**20]).hex(),
+        }
+        for i in range(n)
+    ]
+    return {
+        "details_hex": ["0x" + details.hex()] * n,
+        "counts_hex": ["0x" + counts.hex()] * n,
+        "big_counts": big_counts,
+        "logs": logs,
+    }
+
+
+def generic_logs(logs):
+    out = []
+    for log in logs:
+        option, stake = abi.decode(["uint256", "uint256"], log["data"])
+        qid = abi.decode(["uint256"], log["topics"][1])[0]
+        voter = abi.decode(["address"], log["topics"][2])[0]
+        out.append((qid, voter, option, stake))
+    return out
+
+
+def cases(p, numpy):
+    return [
+        (f"getQuestionDetails x{len(p['details_hex'])}",
+         lambda: [abi.decode(DETAILS_TYPES, h) for h in p["details_hex"]],
+         lambda: fastdecode.batch(p["details_hex"], fastdecode.question_details)),
+        (f"getAllVoteCounts x{len(p['counts_hex'])}",
+         lambda: [abi.decode(["uint256[]"], h) for h in p["counts_hex"]],
+         lambda: fastdecode.batch(p["counts_hex"], lambda mv: fastdecode.vote_counts(mv, numpy=numpy))),
+        (f"uint256[{len(p['logs'])}] in one result",
+         lambda: abi.decode(["uint256[]"], p["big_counts"]),
+         lambda: fastdecode.vote_counts(p["big_counts"], numpy=numpy)),
+        (f"VoteCast logs x{len(p['logs'])}",
+         lambda: generic_logs(p["logs"]),
+         lambda: fastdecode.vote_cast_logs(p["logs"], numpy=numpy)),
+    ]
+
+
+def best(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mpsim.fastdecode against mpsim.abi")
+    parser.add_argument("--n", type=int, default=2000, help="results/logs per case (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--numpy", action="store_true", help="decode word arrays with NumPy")
+    args = parser.parse_args()
+
+    p = payloads(args.n)
+    print(f"{'case':<34}{'generic ms':>12}{'fast ms':>10}{'speedup':>9}")
+    for name, generic, fast in cases(p, args.numpy):
+        g, f = best(generic, args.repeat) * 1000, best(fast, args.repeat) * 1000
+        print(f"{name:<34}{g:>12.2f}{f:>10.2f}{g / f:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Thin wrappers around the ``cast`` binary from Foundry."""
+import json
+import subprocess
+import time
+
+from .config import RPC_URL
+
+
+class CastError(RuntimeError):
+    pass
+
+
+def run(*args, rpc_url=RPC_URL):
+    cmd = ["cast", *(str(a) for a in args)]
+    if rpc_url:
+        cmd += ["--rpc-url", rpc_url]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise CastError((proc.stderr or proc.stdout).strip())
+    return proc.stdout.strip()
+
+
+def rpc(method, *params):
+    return json.loads(run("rpc", "--raw", method, json.dumps(list(params))))
+
+
+def call(to, sig, *args):
+    """Call a view function. ``sig`` may carry return types, e.g. ``"f(uint256)(bool)"``;
+    decoded values come back one per line."""
+    return run("call", to, sig, *args)
+
+
+def call_values(to, sig, *args):
+    # cast annotates large integers, e.g. "100000000000000000000 [1e20]"
+    return [line.split(" [")[0] for line in call(to, sig, *args).splitlines()]
+
+
+def keccak(data):
+    return run("keccak", data, rpc_url=None)
+
+
+def code(address):
+    return run("code", address)
+
+
+def balance(address):
+    return int(run("balance", address))
+
+
+def nonce(address, block="pending"):
+    return int(rpc("eth_getTransactionCount", address, block), 16)
+
+
+def block_timestamp():
+    return int(rpc("eth_getBlockByNumber", "latest", False)["timestamp"], 16)
+
+
+def warp_to(timestamp):
+    """Mine a block at ``timestamp`` unless the chain is already past it (anvil only)."""
+    if block_timestamp() < timestamp:
+        rpc("evm_setNextBlockTimestamp", timestamp)
+        rpc("evm_mine")
+
+
+def mktx(private_key, to, sig, *args, nonce, value=None):
+    """Sign a transaction without sending it and return the raw hex."""
+    extra = ["--value", value] if value else []
+    return run("mktx", "--private-key", private_key, "--nonce", nonce, *extra, to, sig, *args)
+
+
+def publish(raw_tx):
+    return run("publish", "--async", raw_tx)
+
+
+def receipt(tx_hash):
+    return rpc("eth_getTransactionReceipt", tx_hash)
+
+
+def wait_for_receipt(tx_hash, timeout=120, poll=0.2):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        r = receipt(tx_hash)
+        if r is not None:
+            return r
+        time.sleep(poll)
+    raise CastError(f"Timed out waiting for receipt of {tx_hash}")
@@ -0,0 +1,41 @@
+"""``python -m mpsim <command>``: one entry point for the tools in this package.
+
+Only the chosen command's module is imported, so a short command such as
+``tallies`` does not pay for the load generator, the bindings or the forge
+tooling. Each command keeps its own options (``python -m mpsim <command> -h``).
+"""
+import importlib
+import sys
+
+COMMANDS = {
+    "simulate": ("mpsim.simulation", "resumable end-to-end voting demo (voting_simulation.py)"),
+    "tallies": ("mpsim.tallies", "vote counts of every question"),
+    "loadgen": ("mpsim.loadgen", "open-loop load test"),
+    "relayer": ("mpsim.relayer", "sign votes off-chain and relay them in batches"),
+    "accounts": ("mpsim.accounts", "derive, fund and mint simulated MP accounts"),
+    "eligibility": ("mpsim.eligibility", "event-sourced MP roster and offline vote checks"),
+    "replay": ("mpsim.replay", "capture a session and replay it on fresh contracts"),
+    "codegen": ("mpsim.codegen", "regenerate mpsim/bindings.py from out/"),
+    "bench-decode": ("mpsim.bench_decode", "compare the generic and fast ABI decoders"),
+}
+
+
+def usage():
+    width = max(map(len, COMMANDS))
+    lines = ["usage: python -m mpsim <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {help}" for name, (_, help) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    command, *rest = argv
+    if command not in COMMANDS:
+        sys.exit(f"{usage()}\n\nmpsim: unknown command {command!r}")
+    module = importlib.import_module(COMMANDS[command][0])
+    # the command's argparse takes its program name and arguments from sys.argv
+    sys.argv = [f"mpsim {command}", *rest]
+    module.main()
@@ -0,0 +1,628 @@
+"""Generate typed Python bindings for the contracts from forge artifacts.
+
+Reads the ABIs of MPVoting, MPToken, MPTokenFactory and Disperse from ``out/`` (run
+``forge build`` first) and writes ``mpsim/bindings.py``: one class per
+contract with precomputed selectors and event topics, calldata encoders,
+return-data and log decoders, and NamedTuples for structs such as
+``MPToken.MPData``. The generated code does no ABI parsing at runtime.
+
+The bindings record a hash of the artifacts they came from and are only
+rewritten when that hash changes::
+
+    python -m mpsim.codegen            # regenerate if stale
+    python -m mpsim.codegen --check    # exit 1 if stale
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import keyword
+import os
+import sys
+import types
+from pathlib import Path
+
+from .keccak import keccak256
+
+CONTRACTS = ["MPVoting", "MPToken", "MPTokenFactory", "Disperse"]
+ROOT = Path(__file__).resolve().parent.parent
+OUT_DIR = ROOT / "out"
+BINDINGS_PATH = Path(__file__).resolve().parent / "bindings.py"
+HASH_PREFIX = "ARTIFACT_HASH = "
+
+STATIC_WORDS = {
+    "address": "_w_address",
+    "bool": "_w_bool",
+}
+READERS = {
+    "address": "_r_address",
+    "bool": "_r_bool",
+    "string": "_r_string",
+    "bytes": "_r_bytes",
+}
+
+
+class Param:
+    name: str
+    ty: str
+    components: list["Param"]
+    struct: str
+    indexed: bool
+
+    def __init__(self, name: str, ty: str, components: list["Param"], struct: str, indexed: bool):
+        self.name = name
+        self.ty = ty
+        self.components = components
+        self.struct = struct
+        self.indexed = indexed
+
+    @staticmethod
+    def from_dict(d: dict) -> "Param":
+        internal = d.get("internalType", "")
+        struct = internal.split()[-1].split(".")[-1].split("[")[0] if internal.startswith("struct ") else ""
+        return Param(
+            d.get("name", ""),
+            d["type"],
+            [Param.from_dict(c) for c in d.get("components", [])],
+            struct,
+            d.get("indexed", False),
+        )
+
+    def canonical(self) -> str:
+        """The type as it appears in a signature, with tuples spelled out."""
+        if self.ty.startswith("tuple"):
+            return "(" + ",".join(c.canonical() for c in self.components) + ")" + self.ty[len("tuple"):]
+        return self.ty
+
+
+class Function:
+    name: str
+    inputs: list[Param]
+    outputs: list[Param]
+    mutability: str
+    signature: str
+    selector: str
+
+    def __init__(self, name: str, inputs: list[Param], outputs: list[Param], mutability: str):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.mutability = mutability
+        self.signature = f"{name}({','.join(p.canonical() for p in inputs)})"
+        self.selector = keccak256(self.signature)[:4].hex()
+
+    @staticmethod
+    def from_dict(d: dict) -> "Function":
+        return Function(
+            d["name"],
+            [Param.from_dict(p) for p in d["inputs"]],
+            [Param.from_dict(p) for p in d["outputs"]],
+            d["stateMutability"],
+        )
+
+
+class Event:
+    name: str
+    inputs: list[Param]
+    signature: str
+    topic: str
+
+    def __init__(self, name: str, inputs: list[Param]):
+        self.name = name
+        self.inputs = inputs
+        self.signature = f"{name}({','.join(p.canonical() for p in inputs)})"
+        self.topic = keccak256(self.signature).hex()
+
+    @staticmethod
+    def from_dict(d: dict) -> "Event":
+        return Event(d["name"], [Param.from_dict(p) for p in d["inputs"]])
+
+
+class Struct:
+    name: str
+    fields: list[Param]
+
+    def __init__(self, name: str, fields: list[Param]):
+        self.name = name
+        self.fields = fields
+
+
+class Contract:
+    name: str
+    functions: list[Function]
+    events: list[Event]
+
+    def __init__(self, name: str, functions: list[Function], events: list[Event]):
+        self.name = name
+        self.functions = functions
+        self.events = events
+
+    @staticmethod
+    def from_artifact(name: str, artifact: dict) -> "Contract":
+        abi = artifact["abi"]
+        return Contract(
+            name,
+            [Function.from_dict(d) for d in abi if d["type"] == "function"],
+            [Event.from_dict(d) for d in abi if d["type"] == "event"],
+        )
+
+
+def artifact_paths(out_dir=OUT_DIR):
+    return [Path(out_dir) / f"{name}.sol" / f"{name}.json" for name in CONTRACTS]
+
+
+def artifact_hash(out_dir=OUT_DIR) -> str:
+    h = hashlib.sha256()
+    for path in artifact_paths(out_dir):
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def bindings_hash(path=BINDINGS_PATH):
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(HASH_PREFIX):
+                    return line[len(HASH_PREFIX):].strip().strip('"')
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def py_name(name: str, index: int, prefix="value") -> str:
+    name = name.lstrip("_") or f"{prefix}{index}"
+    return name + "_" if keyword.iskeyword(name) else name
+
+
+def tup(items) -> str:
+    items = list(items)
+    return f"({items[0]},)" if len(items) == 1 else f"({', '.join(items)})"
+
+
+def class_name(name: str) -> str:
+    return name[0].upper() + name[1:]
+
+
+def split_array(ty: str):
+    """``uint256[]`` -> ``("uint256", None)``; ``uint256[3]`` -> ``("uint256", 3)``; else None."""
+    if not ty.endswith("]"):
+        return None
+    base, _, size = ty[:-1].rpartition("[")
+    return base, int(size) if size else None
+
+
+def element(p: Param) -> Param:
+    base, _ = split_array(p.ty)
+    return Param(p.name, base, p.components, p.struct, False)
+
+
+def is_dynamic(p: Param) -> bool:
+    if p.ty in ("string", "bytes"):
+        return True
+    arr = split_array(p.ty)
+    if arr:
+        return arr[1] is None or is_dynamic(element(p))
+    if p.ty == "tuple":
+        return any(is_dynamic(c) for c in p.components)
+    return False
+
+
+def head_size(p: Param) -> int:
+    if is_dynamic(p):
+        return 32
+    arr = split_array(p.ty)
+    if arr:
+        return arr[1] * head_size(element(p))
+    if p.ty == "tuple":
+        return sum(head_size(c) for c in p.components)
+    return 32
+
+
+class Printer:
+    """Emits the bindings module. Type-specific helpers are generated once per type and reused."""
+
+    def __init__(self):
+        self.structs: dict[str, Struct] = {}
+        self.helpers: dict[str, str] = {}
+        self.out = []
+
+    def p(self, line=""):
+        self.out.append(line)
+
+    # -- type naming ------------------------------------------------------
+
+    def type_key(self, p: Param) -> str:
+        if p.ty.startswith("tuple"):
+            return (p.struct or "tuple" + hashlib.sha1(p.canonical().encode()).hexdigest()[:8]) + p.ty[len("tuple"):]
+        return p.ty
+
+    def py_type(self, p: Param) -> str:
+        arr = split_array(p.ty)
+        if arr:
+            return f"list[{self.py_type(element(p))}]"
+        if p.ty == "tuple":
+            return self.struct_class(p)
+        if p.ty.startswith(("uint", "int")):
+            return "int"
+        if p.ty in ("address", "string"):
+            return "str"
+        if p.ty == "bool":
+            return "bool"
+        return "bytes"
+
+    def struct_class(self, p: Param) -> str:
+        name = p.struct or self.type_key(p)
+        if name not in self.structs:
+            self.structs[name] = Struct(name, p.components)
+        return name
+
+    def mangle(self, p: Param) -> str:
+        return self.type_key(p).replace("[]", "_arr").replace("[", "_").replace("]", "")
+
+    # -- encoders ---------------------------------------------------------
+
+    def encoder(self, p: Param) -> str:
+        """Name of a function turning a value of ``p`` into its ABI encoding.
+
+        Static types encode to their head; dynamic types to their tail.
+        """
+        arr = split_array(p.ty)
+        if arr:
+            return self.array_encoder(p, arr[1])
+        if p.ty.startswith("uint"):
+            return "_w_uint"
+        if p.ty.startswith("int"):
+            return "_w_int"
+        if p.ty in STATIC_WORDS:
+            return STATIC_WORDS[p.ty]
+        if p.ty.startswith("bytes") and p.ty != "bytes":
+            return "_w_fixed"
+        if p.ty in ("string", "bytes"):
+            return "_t_bytes"
+        name = f"_enc_{self.mangle(p)}"
+        if name not in self.helpers:
+            self.helpers[name] = ""
+            encs = tup(self.encoder(c) for c in p.components)
+            dyn = tup(str(is_dynamic(c)) for c in p.components)
+            self.helpers[name] = f"def {name}(v):\n    return _enc_seq({encs}, {dyn}, v)\n"
+        return name
+
+    def array_encoder(self, p: Param, size) -> str:
+        name = f"_enc_{self.mangle(p)}"
+        if name not in self.helpers:
+            self.helpers[name] = ""
+            elem = element(p)
+            enc = self.encoder(elem)
+            if size is not None:
+                body = f"    return _enc_seq([{enc}] * {size}, [{is_dynamic(elem)}] * {size}, v)"
+            elif not is_dynamic(elem):
+                body = f"    return _w_uint(len(v)) + b\"\".join(map({enc}, v))"
+            else:
+                body = f"    return _w_uint(len(v)) + _enc_seq([{enc}] * len(v), [True] * len(v), v)"
+            self.helpers[name] = f"def {name}(v):\n{body}\n"
+        return name
+
+    # -- decoders ---------------------------------------------------------
+
+    def reader(self, p: Param) -> str:
+        """Name of a function reading a value of ``p`` at position ``pos`` of ``d``.
+
+        For dynamic types ``pos`` is where the tail starts, for static types
+        where the head starts.
+        """
+        arr = split_array(p.ty)
+        if arr:
+            return self.array_reader(p, arr[1])
+        if p.ty.startswith("uint"):
+            return "_r_uint"
+        if p.ty.startswith("int"):
+            return "_r_int"
+        if p.ty in READERS:
+            return READERS[p.ty]
+        if p.ty.startswith("bytes"):
+            return self.fixed_reader(int(p.ty[5:]))
+        name = f"_dec_{self.mangle(p)}"
+        if name not in self.helpers:
+            self.helpers[name] = ""
+            cls = self.struct_class(p)
+            fields = ", ".join(self.read_fields(p.components, "pos"))
+            self.helpers[name] = f"def {name}(d, pos):\n    return {cls}({fields})\n"
+        return name
+
+    def array_reader(self, p: Param, size) -> str:
+        name = f"_dec_{self.mangle(p)}"
+        if name not in self.helpers:
+            self.helpers[name] = ""
+            elem = element(p)
+            rd = self.reader(elem)
+            if size is None:
+                count, start = "_r_uint(d, pos)", "pos + 32"
+            else:
+                count, start = str(size), "pos"
+            if is_dynamic(elem):
+                item = f"{rd}(d, base + _r_uint(d, base + 32 * i))"
+            else:
+                item = f"{rd}(d, base + {head_size(elem)} * i)"
+            self.helpers[name] = (f"def {name}(d, pos):\n"
+                                  f"    n, base = {count}, {start}\n"
+                                  f"    return [{item} for i in range(n)]\n")
+        return name
+
+    def fixed_reader(self, n: int) -> str:
+        name = f"_r_fixed{n}"
+        self.helpers.setdefault(name, f"def {name}(d, pos):\n    return bytes(d[pos:pos + {n}])\n")
+        return name
+
+    def read_fields(self, params: list[Param], base: str) -> list[str]:
+        """Expressions reading each of ``params`` from a sequence starting at ``base``."""
+        parts, off = [], 0
+        for param in params:
+            rd = self.reader(param)
+            at = f"{base} + {off}" if off else base
+            if is_dynamic(param):
+                parts.append(f"{rd}(d, {base} + _r_uint(d, {at}))")
+            else:
+                parts.append(f"{rd}(d, {at})")
+            off += head_size(param)
+        return parts
+
+    # -- contracts --------------------------------------------------------
+
+    def p_function(self, contract: str, f: Function, name: str):
+        args = [py_name(p.name, i, "arg") for i, p in enumerate(f.inputs)]
+        sig = ", ".join(f"{a}: {self.py_type(p)}" for a, p in zip(args, f.inputs))
+        self.p("    @staticmethod")
+        self.p(f"    def {name}({sig}) -> str:")
+        self.p(f'        """Calldata for ``{f.signature}`` ({f.mutability})."""')
+        if not f.inputs:
+            self.p(f'        return "0x{f.selector}"')
+        else:
+            encs = tup(self.encoder(p) for p in f.inputs)
+            dyn = tup(str(is_dynamic(p)) for p in f.inputs)
+            self.p(f'        return "0x{f.selector}" + _enc_seq({encs}, {dyn}, {tup(args)}).hex()')
+        self.p()
+
+        if not f.outputs:
+            return
+        if len(f.outputs) == 1:
+            ret = self.py_type(f.outputs[0])
+        else:
+            ret = f"{class_name(name)}Result"
+            self.p(f"    class {ret}(NamedTuple):")
+            for i, p in enumerate(f.outputs):
+                self.p(f"        {py_name(p.name, i)}: {self.py_type(p)}")
+            self.p()
+            ret = f"{contract}.{ret}"
+        self.p("    @staticmethod")
+        self.p(f"    def decode_{name}(data) -> \"{ret}\":")
+        self.p("        d = _data(data)")
+        fields = ", ".join(self.read_fields(f.outputs, "0"))
+        if len(f.outputs) == 1:
+            self.p(f"        return {fields}")
+        else:
+            self.p(f"        return {ret}({fields})")
+        self.p()
+
+    def p_event(self, contract: str, e: Event):
+        indexed = [p for p in e.inputs if p.indexed]
+        plain = [p for p in e.inputs if not p.indexed]
+        self.p(f"    class {e.name}(NamedTuple):")
+        self.p(f'        """``{e.signature}``"""')
+        for i, p in enumerate(e.inputs):
+            # indexed dynamic values are only available as their keccak hash
+            ty = "bytes" if p.indexed and is_dynamic(p) else self.py_type(p)
+            self.p(f"        {py_name(p.name, i)}: {ty}")
+        self.p()
+        self.p("    @staticmethod")
+        self.p(f"    def decode_{e.name}(log) -> \"{contract}.{e.name}\":")
+        self.p('        topics, d = log["topics"], _data(log["data"])')
+        values, data_reads = [], iter(self.read_fields(plain, "0"))
+        topic = 1
+        for p in e.inputs:
+            if p.indexed:
+                rd = self.fixed_reader(32) if is_dynamic(p) else self.reader(p)
+                values.append(f"{rd}(_data(topics[{topic}]), 0)")
+                topic += 1
+            else:
+                values.append(next(data_reads))
+        self.p(f"        return {contract}.{e.name}({', '.join(values)})")
+        self.p()
+
+    def p_contract(self, c: Contract):
+        self.p(f"class {c.name}:")
+        self.p(f'    """Encoders and decoders for {c.name}."""')
+        self.p()
+        names = {}
+        for f in c.functions:
+            names[f.selector] = f.name if sum(g.name == f.name for g in c.functions) == 1 else f"{f.name}_{f.selector}"
+        self.p("    SELECTORS = {")
+        for f in c.functions:
+            self.p(f'        "{names[f.selector]}": "0x{f.selector}",')
+        self.p("    }")
+        self.p("    TOPICS = {")
+        for e in c.events:
+            self.p(f'        "{e.name}": "0x{e.topic}",')
+        self.p("    }")
+        self.p()
+        for f in c.functions:
+            self.p_function(c.name, f, names[f.selector])
+        for e in c.events:
+            self.p_event(c.name, e)
+        self.p("    @staticmethod")
+        self.p("    def decode_log(log):")
+        self.p('        """Decode a log emitted by this contract, or return None for unknown topics."""')
+        self.p('        decoder = _LOG_DECODERS_' + c.name + '.get(log["topics"][0].lower()) if log["topics"] else None')
+        self.p("        return decoder(log) if decoder else None")
+        self.p()
+        self.p()
+        self.p(f"_LOG_DECODERS_{c.name} = {{")
+        for e in c.events:
+            self.p(f'    "0x{e.topic}": {c.name}.decode_{e.name},')
+        self.p("}")
+        self.p()
+        self.p()
+
+
+PRELUDE = '''\
+def _data(x):
+    return bytes.fromhex(x[2:] if x[:2] == "0x" else x) if isinstance(x, str) else x
+
+
+def _w_uint(v):
+    return int(v).to_bytes(32, "big")
+
+
+def _w_int(v):
+    return int(v).to_bytes(32, "big", signed=True)
+
+
+def _w_bool(v):
+    return _w_uint(1 if v else 0)
+
+
+def _w_address(v):
+    return bytes(12) + bytes.fromhex(v[2:] if v[:2] == "0x" else v)
+
+
+def _w_fixed(v):
+    return bytes(v).ljust(32, b"\\x00")
+
+
+def _t_bytes(v):
+    v = v.encode() if isinstance(v, str) else bytes(v)
+    return _w_uint(len(v)) + v + bytes(-len(v) % 32)
+
+
+def _enc_seq(encoders, dynamic, values):
+    parts = [enc(v) for enc, v in zip(encoders, values)]
+    offset = sum(32 if dyn else len(part) for dyn, part in zip(dynamic, parts))
+    heads, tails = [], []
+    for dyn, part in zip(dynamic, parts):
+        if dyn:
+            heads.append(_w_uint(offset))
+            tails.append(part)
+            offset += len(part)
+        else:
+            heads.append(part)
+    return b"".join(heads) + b"".join(tails)
+
+
+def _r_uint(d, pos):
+    return int.from_bytes(d[pos:pos + 32], "big")
+
+
+def _r_int(d, pos):
+    return int.from_bytes(d[pos:pos + 32], "big", signed=True)
+
+
+def _r_bool(d, pos):
+    return d[pos + 31] != 0
+
+
+def _r_address(d, pos):
+    return "0x" + d[pos + 12:pos + 32].hex()
+
+
+def _r_bytes(d, pos):
+    return bytes(d[pos + 32:pos + 32 + _r_uint(d, pos)])
+
+
+def _r_string(d, pos):
+    return _r_bytes(d, pos).decode()
+
+
+'''
+
+
+def generate(out_dir=OUT_DIR) -> str:
+    contracts = []
+    for name, path in zip(CONTRACTS, artifact_paths(out_dir)):
+        contracts.append(Contract.from_artifact(name, json.loads(path.read_text())))
+
+    pp = Printer()
+    for c in contracts:
+        pp.p_contract(c)
+    body = pp.out
+
+    # struct classes and helpers are known only after the contracts were printed;
+    # keep generating until printing the structs adds no new helpers
+    while True:
+        before = (len(pp.structs), len(pp.helpers))
+        pp.out = []
+        for s in list(pp.structs.values()):
+            pp.p(f"class {s.name}(NamedTuple):")
+            for i, f in enumerate(s.fields):
+                pp.p(f"    {py_name(f.name, i)}: {pp.py_type(f)}")
+            pp.p()
+            pp.p()
+        for s in list(pp.structs.values()):
+            tup = Param(s.name, "tuple", s.fields, s.name, False)
+            pp.encoder(tup)
+            pp.reader(tup)
+        if (len(pp.structs), len(pp.helpers)) == before:
+            break
+    structs = pp.out
+
+    out = [
+        "# Automatically @generated by mpsim/codegen.py. Do not modify manually.",
+        "from typing import NamedTuple",
+        "",
+        f'{HASH_PREFIX}"{artifact_hash(out_dir)}"',
+        "",
+        "",
+        PRELUDE,
+    ]
+    out += structs
+    for helper in pp.helpers.values():
+        out.append(helper)
+        out.append("")
+    out += body
+    return "\n".join(out).rstrip() + "\n"
+
+
+def ensure(out_dir=OUT_DIR, target=BINDINGS_PATH, force=False) -> bool:
+    """Regenerate the bindings if the artifacts changed; returns True if it wrote them."""
+    if not force and bindings_hash(target) == artifact_hash(out_dir):
+        return False
+    source = generate(out_dir)
+    tmp = Path(f"{target}.tmp")
+    tmp.write_text(source)
+    os.replace(tmp, target)
+    return True
+
+
+def load(out_dir=OUT_DIR):
+    """Import the bindings, regenerating them first if the artifacts are available and newer."""
+    if all(p.exists() for p in artifact_paths(out_dir)) and ensure(out_dir) and "mpsim.bindings" in sys.modules:
+        return importlib.reload(sys.modules["mpsim.bindings"])
+    return importlib.import_module("mpsim.bindings")
+
+
+def load_build(out_dir):
+    """Bindings for the artifacts in ``out_dir``, generated in memory so mpsim/bindings.py is left alone."""
+    if Path(out_dir).resolve() == OUT_DIR.resolve():
+        return load()
+    module = types.ModuleType("mpsim.bindings")
+    exec(compile(generate(out_dir), str(Path(out_dir)), "exec"), module.__dict__)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate mpsim/bindings.py from forge artifacts")
+    parser.add_argument("--out", default=str(OUT_DIR), help="forge output directory (default: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="regenerate even if the artifacts are unchanged")
+    parser.add_argument("--check", action="store_true", help="only report whether the bindings are stale")
+    args = parser.parse_args()
+
+    missing = [str(p) for p in artifact_paths(args.out) if not p.exists()]
+    if missing:
+        parser.error(f"missing artifacts (run `forge build`): {', '.join(missing)}")
+    if args.check:
+        stale = bindings_hash() != artifact_hash(args.out)
+        print("bindings are stale" if stale else "bindings are up to date")
+        sys.exit(1 if stale else 0)
+    print("regenerated mpsim/bindings.py" if ensure(args.out, force=args.force) else "bindings are up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Event-sourced MP roster for checking votes before they are sent.
+
+``MPVoting.isValidMPVoter`` walks every MP token, so asking the node whether a
+vote will go through costs an ``eth_call`` that grows with the chamber. This
+module rebuilds the same state from the ``MPToken`` events (``Transfer``,
+``MPTokenMinted``, ``MPStatusChanged``, ``MPTokenExpired``) and the question
+and ``VoteCast`` events of ``MPVoting``, then answers per vote in O(1) with
+the ``require`` message the contract would revert with.
+
+Each owner keeps the latest expiration among its active tokens, so expiry is
+a comparison against block time rather than a scan. Stake and deposit checks
+are left to the node; a vote that passes here can still fail on funds.
+
+::
+
+    python -m mpsim.eligibility --voting $VOTING_ADDRESS
+    python -m mpsim.eligibility --voting $VOTING_ADDRESS --check 0x7099... --question 3
+"""
+import argparse
+import os
+import time
+from collections import Counter, defaultdict
+
+from . import codegen, fastdecode, rpc
+from .config import RPC_URL
+
+ZERO_ADDRESS = "0x" + "00" * 20
+OPTIONS = 3
+LOG_CHUNK = 5000
+
+
+class Eligibility:
+    """Local mirror of the checks ``MPVoting`` makes before recording a vote."""
+
+    def __init__(self, client, voting, from_block=0, bindings=None):
+        self.client = client
+        self.voting = voting.lower()
+        b = bindings or codegen.load()
+        self._voting_abi, self._token_abi = b.MPVoting, b.MPToken
+        mp = b.MPVoting
+        self.token = mp.decode_mpToken(client.call("eth_call", {"to": voting, "data": mp.mpToken()}, "latest")).lower()
+        self.block = from_block - 1
+        self.timestamp = 0
+        self._synced_at = time.monotonic()
+        self.owner = {}  # token id -> owner
+        self.active = {}
+        self.expiration = {}
+        self.tokens = defaultdict(set)  # owner -> token ids
+        self.eligible_until = {}  # owner -> last block timestamp at which it is a valid voter
+        self.windows = {}  # question id -> (start, end)
+        self.closed = set()
+        self.voted = set()  # (question id, voter)
+        self.pending = set()  # accepted by filter() but not seen on chain yet
+
+    def sync(self):
+        """Apply the events of every block since the last sync; returns the number of logs applied."""
+        latest = self.client.call("eth_getBlockByNumber", "latest", False)
+        head = int(latest["number"], 16)
+        logs = []
+        for lo in range(self.block + 1, head + 1, LOG_CHUNK):
+            logs += self.client.call("eth_getLogs", {
+                "address": [self.voting, self.token],
+                "fromBlock": hex(lo),
+                "toBlock": hex(min(lo + LOG_CHUNK - 1, head)),
+            })
+        # votes only ever add to a set, so they can skip the per-log path and be decoded in one pass
+        vote_cast = self._voting_abi.TOPICS["VoteCast"]
+        votes, rest = [], []
+        for log in logs:
+            is_vote = log["topics"][:1] == [vote_cast] and log["address"].lower() == self.voting
+            (votes if is_vote else rest).append(log)
+        question_ids, voters, _, _ = fastdecode.vote_cast_logs(votes)
+        self.voted.update(zip(question_ids, voters))
+        rest.sort(key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+        for log in rest:
+            self.apply(log)
+        self.block = head
+        self.timestamp = int(latest["timestamp"], 16)
+        self._synced_at = time.monotonic()
+        self.pending -= self.voted
+        return len(logs)
+
+    def apply(self, log):
+        address = log["address"].lower()
+        if address == self.token:
+            event = self._token_abi.decode_log(log)
+        elif address == self.voting:
+            event = self._voting_abi.decode_log(log)
+        else:
+            return
+        handler = getattr(self, f"_on_{type(event).__name__}", None) if event is not None else None
+        if handler:
+            handler(event)
+
+    def _on_Transfer(self, e):
+        old = self.owner.pop(e.tokenId, None)
+        if old is not None:
+            self.tokens[old].discard(e.tokenId)
+            self._refresh(old)
+        if e.to != ZERO_ADDRESS:
+            new = e.to.lower()
+            self.owner[e.tokenId] = new
+            self.tokens[new].add(e.tokenId)
+            self._refresh(new)
+
+    def _on_MPTokenMinted(self, e):
+        self.active[e.tokenId] = True
+        self.expiration[e.tokenId] = e.expirationDate
+        self._refresh(self.owner.get(e.tokenId))
+
+    def _on_MPStatusChanged(self, e):
+        self.active[e.tokenId] = e.isActive
+        self._refresh(self.owner.get(e.tokenId))
+
+    def _on_MPTokenExpired(self, e):
+        # the burn's Transfer already removed the token from its owner
+        self.active.pop(e.tokenId, None)
+        self.expiration.pop(e.tokenId, None)
+
+    def _on_QuestionCreated(self, e):
+        self.windows[e.questionId] = (e.startTime, e.endTime)
+
+    def _on_QuestionClosed(self, e):
+        self.closed.add(e.questionId)
+
+    def _on_QuestionClosedWithDraw(self, e):
+        self.closed.add(e.questionId)
+
+    def _on_VoteCast(self, e):
+        self.voted.add((e.questionId, e.voter.lower()))
+
+    def _refresh(self, owner):
+        if owner is None:
+            return
+        until = max((self.expiration[t] for t in self.tokens[owner] if self.active.get(t)), default=-1)
+        if until < 0:
+            self.eligible_until.pop(owner, None)
+        else:
+            self.eligible_until[owner] = until
+
+    def now(self):
+        """Estimated timestamp of the next block: the last synced one plus the wall time since."""
+        return self.timestamp + int(time.monotonic() - self._synced_at) + 1
+
+    def is_valid_voter(self, voter, at=None):
+        return self.eligible_until.get(voter.lower(), -1) >= (self.now() if at is None else at)
+
+    def check(self, question_id, option_index, voter, at=None):
+        """The revert message a vote would hit at block time ``at``, or None if it would pass."""
+        at = self.now() if at is None else at
+        window = self.windows.get(question_id)
+        if window is None:
+            return "Invalid question ID"
+        if question_id in self.closed:
+            return "Question is not active"
+        if at < window[0]:
+            return "Voting has not started yet"
+        if at > window[1]:
+            return "Voting has ended"
+        if not 0 <= option_index < OPTIONS:
+            return "Invalid option index"
+        key = (question_id, voter.lower())
+        if key in self.voted or key in self.pending:
+            return "Already voted"
+        if self.eligible_until.get(key[1], -1) < at:
+            return "Not a valid MP voter"
+        return None
+
+    def filter(self, votes, at=None):
+        """Split ``(questionId, optionIndex, voter, ...)`` tuples into ``(accepted, [(vote, reason)])``.
+
+        Accepted votes count as cast from then on, so a second vote by the same
+        MP on the same question is rejected even before the first is mined.
+        """
+        at = self.now() if at is None else at
+        accepted, rejected = [], []
+        for vote in votes:
+            reason = self.check(vote[0], vote[1], vote[2], at)
+            if reason:
+                rejected.append((vote, reason))
+            else:
+                accepted.append(vote)
+                self.pending.add((vote[0], vote[2].lower()))
+        return accepted, rejected
+
+    def release(self, votes):
+        """Forget votes accepted by :meth:`filter` that the node then rejected, so they can be retried."""
+        for vote in votes:
+            self.pending.discard((vote[0], vote[2].lower()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the MP roster from events and check voters offline")
+    parser.add_argument("--rpc-url", default=RPC_URL)
+    parser.add_argument("--voting", default=os.environ.get("VOTING_ADDRESS"), help="MPVoting address (default: $VOTING_ADDRESS)")
+    parser.add_argument("--check", metavar="ADDRESS", help="voter to check")
+    parser.add_argument("--question", type=int, help="question to check --check against")
+    parser.add_argument("--option", type=int, default=0)
+    args = parser.parse_args()
+    if not args.voting:
+        parser.error("--voting or $VOTING_ADDRESS is required")
+
+    client = rpc.Client(args.rpc_url)
+    roster = Eligibility(client, args.voting)
+    start = time.perf_counter()
+    n = roster.sync()
+    print(f"Applied {n} logs up to block {roster.block} in {time.perf_counter() - start:.2f}s")
+    at = roster.timestamp
+    status = Counter("eligible" if until >= at else "expired" for until in roster.eligible_until.values())
+    print(f"MP token holders: {len(roster.eligible_until)} ({status['eligible']} eligible, {status['expired']} expired)")
+    print(f"Questions: {len(roster.windows)} ({len(roster.closed)} closed), votes cast: {len(roster.voted)}")
+    if args.check:
+        if args.question is None:
+            print(f"{args.check}: {'valid' if roster.is_valid_voter(args.check) else 'not a valid'} MP voter")
+        else:
+            reason = roster.check(args.question, args.option, args.check)
+            print(f"{args.check} on question {args.question}: {reason or 'would be accepted'}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
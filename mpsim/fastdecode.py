@@ -0,0 +1,191 @@
+"""Decoders specialised for MPVoting's bulk read paths.
+
+The generic codec in :mod:`mpsim.abi` parses type strings and slices copies of
+the input for every value. These decoders know MPVoting's return layouts and
+work on a single ``memoryview`` of the return data: a JSON-RPC hex result is
+converted to bytes once with :func:`from_hex` and nothing after that goes
+through hex strings again.
+
+Arrays of static words (``uint256[]`` vote counts, the data of many
+``VoteCast`` logs) are decoded in one pass with :mod:`array`, or with NumPy
+when it is installed and ``numpy=True`` is asked for. Values that do not fit
+in 64 bits fall back to Python ints.
+
+``python -m mpsim.bench_decode`` compares these against the generic decoder.
+"""
+import sys
+from array import array
+from typing import NamedTuple
+
+_LITTLE = sys.byteorder == "little"
+
+
+class QuestionDetails(NamedTuple):
+    question: str
+    options: list[str]
+    startTime: int
+    endTime: int
+    isActive: bool
+    totalVotes: int
+    vault: str
+    totalStaked: int
+    winningOption: int
+
+
+class StakeInfo(NamedTuple):
+    staked: int
+    returned: bool
+    canClaim: bool
+
+
+def from_hex(result):
+    """``"0x..."`` RPC result -> memoryview over its bytes."""
+    return memoryview(bytes.fromhex(result[2:] if result[:2] == "0x" else result))
+
+
+def _view(data):
+    if isinstance(data, str):
+        return from_hex(data)
+    return data if isinstance(data, memoryview) else memoryview(data)
+
+
+def _uint(mv, pos):
+    return int.from_bytes(mv[pos:pos + 32], "big")
+
+
+def _string(mv, pos):
+    n = int.from_bytes(mv[pos:pos + 32], "big")
+    return str(mv[pos + 32:pos + 32 + n], "utf-8")
+
+
+def words(mv, count, columns=1, numpy=False):
+    """Decode ``count`` rows of ``columns`` consecutive uint256 words starting at ``mv[0]``.
+
+    Returns one sequence per column: an ``array('Q')`` (or a NumPy ``uint64``
+    array) when every value in that column fits in 64 bits, otherwise a list
+    of ints.
+    """
+    size = count * columns * 32
+    body = mv[:size]
+    if len(body) != size:
+        raise ValueError(f"need {size} bytes for {count}x{columns} words, got {len(body)}")
+    step = 4 * columns
+    out = []
+    if numpy:
+        import numpy as np
+
+        quads = np.frombuffer(body, dtype=">u8").reshape(count, columns, 4)
+        for c in range(columns):
+            if quads[:, c, :3].any():
+                out.append(_column_ints(body, count, columns, c))
+            else:
+                out.append(quads[:, c, 3].astype(np.uint64))
+        return out
+    quads = array("Q")
+    quads.frombytes(body)
+    for c in range(columns):
+        high = quads[4 * c::step] + quads[4 * c + 1::step] + quads[4 * c + 2::step]
+        # comparing raw bytes keeps the zero check in C
+        if high.tobytes() != bytes(len(high) * 8):
+            out.append(_column_ints(body, count, columns, c))
+            continue
+        low = quads[4 * c + 3::step]
+        if _LITTLE:
+            low.byteswap()
+        out.append(low)
+    return out
+
+
+def _column_ints(body, count, columns, c):
+    return [int.from_bytes(body[(r * columns + c) * 32:(r * columns + c + 1) * 32], "big") for r in range(count)]
+
+
+def uint_array(data, pos=0, numpy=False):
+    """A ``uint256[]`` whose offset word sits at ``pos``."""
+    mv = _view(data)
+    start = _uint(mv, pos)
+    count = _uint(mv, start)
+    return words(mv[start + 32:], count, numpy=numpy)[0]
+
+
+def string_array(mv, pos):
+    """A ``string[]`` whose tail starts at ``pos``."""
+    count = _uint(mv, pos)
+    base = pos + 32
+    return [_string(mv, base + _uint(mv, base + 32 * i)) for i in range(count)]
+
+
+def vote_counts(data, numpy=False):
+    """``getAllVoteCounts`` return data."""
+    return uint_array(data, 0, numpy=numpy)
+
+
+def question_details(data):
+    """``getQuestionDetails`` return data."""
+    mv = _view(data)
+    return QuestionDetails(
+        _string(mv, _uint(mv, 0)),
+        string_array(mv, _uint(mv, 32)),
+        _uint(mv, 64),
+        _uint(mv, 96),
+        mv[159] != 0,
+        _uint(mv, 160),
+        "0x" + mv[204:224].hex(),
+        _uint(mv, 224),
+        _uint(mv, 256),
+    )
+
+
+def stake_info(data):
+    """``getStakeInfo`` return data."""
+    mv = _view(data)
+    return StakeInfo(_uint(mv, 0), mv[63] != 0, mv[95] != 0)
+
+
+def check_vote(data):
+    """``checkVote`` return data as ``(hasVoted, optionIndex)``."""
+    mv = _view(data)
+    return mv[31] != 0, _uint(mv, 32)
+
+
+def aggregate3(data):
+    """Multicall3 ``aggregate3`` return data, ``(bool success, bytes returnData)[]``.
+
+    Each ``returnData`` comes back as a memoryview into ``data`` (no copy), so
+    it can be handed straight to one of the decoders above.
+    """
+    mv = _view(data)
+    start = _uint(mv, 0)
+    count = _uint(mv, start)
+    base = start + 32
+    results = []
+    for i in range(count):
+        item = base + _uint(mv, base + 32 * i)
+        ret = item + _uint(mv, item + 32)
+        n = _uint(mv, ret)
+        results.append((mv[item + 31] != 0, mv[ret + 32:ret + 32 + n]))
+    return results
+
+
+def batch(results, decoder):
+    """Decode a list of JSON-RPC ``eth_call`` results with one of the decoders above.
+
+    Errors (anything that is not a hex string, e.g. an ``RPCError`` from
+    :meth:`mpsim.rpc.Client.batch`) are passed through unchanged.
+    """
+    return [decoder(from_hex(r)) if isinstance(r, str) else r for r in results]
+
+
+def vote_cast_logs(logs, numpy=False):
+    """Columns ``(questionIds, voters, options, stakes)`` for many ``VoteCast`` logs.
+
+    The data of all logs (two static words each) is joined and decoded in one
+    pass; the indexed question id and voter come from the topics.
+    """
+    n = len(logs)
+    data = memoryview(bytes.fromhex("".join(log["data"][2:] for log in logs)))
+    options, stakes = words(data, n, columns=2, numpy=numpy)
+    ids = memoryview(bytes.fromhex("".join(log["topics"][1][2:] for log in logs)))
+    question_ids = words(ids, n, numpy=numpy)[0]
+    voters = ["0x" + log["topics"][2][-40:] for log in logs]
+    return question_ids, voters, options, stakes
@@ -0,0 +1,143 @@
+"""Write-ahead journal of simulation steps.
+
+Every transaction is signed locally, written to the journal with its hash and
+nonce, and only then broadcast. After a crash the journal is replayed: mined
+transactions are picked up from their receipts, signed-but-unmined ones are
+rebroadcast while their nonce is still free, and anything else is checked
+against contract state before it is planned again. Steps that already completed
+are skipped, so a rerun continues from the first incomplete step.
+
+Only a transaction that was mined and reverted is a terminal failure. A step
+whose gas estimation reverted never reached the chain; it is recorded as
+rejected and checked and planned again on the next run, since the cause
+(e.g. an earlier step that failed) may have been fixed by then.
+
+The file is JSON lines, one record per state change; the last record for a
+step wins.
+"""
+import json
+import os
+
+from . import cast
+
+PLANNED = "planned"
+SENT = "sent"
+DONE = "done"
+FAILED = "failed"
+REJECTED = "rejected"
+
+
+class JournalError(RuntimeError):
+    pass
+
+
+class Journal:
+    def __init__(self, path, fresh=False):
+        self.path = path
+        self.entries = {}
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            good = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError(line)
+                        record = json.loads(line)
+                    except ValueError:
+                        # a torn final write from the crash we are recovering from
+                        break
+                    self.entries[record["step"]] = record
+                    good += len(line)
+            os.truncate(path, good)
+        self._file = open(path, "a")
+
+    def close(self):
+        self._file.close()
+
+    def _write(self, step, state, **fields):
+        record = {**self.entries.get(step, {}), **fields, "step": step, "state": state}
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries[step] = record
+        return record
+
+    def completed(self, step):
+        return self.entries.get(step, {}).get("state") in (DONE, FAILED)
+
+    def once(self, step, fn):
+        """Run ``fn`` the first time ``step`` is reached and return its stored result afterwards."""
+        record = self.entries.get(step)
+        if record and record["state"] == DONE:
+            return record["result"]
+        return self._write(step, DONE, result=fn())["result"]
+
+    def send(self, step, private_key, sender, to, sig, *args, value=None, check=None):
+        """Send a transaction exactly once across restarts.
+
+        ``check`` is an optional callable returning True when the step's effect
+        is already visible on chain (e.g. ``checkVote`` reports a vote); it is
+        consulted before anything is (re)planned. Returns the step's final
+        record, which carries ``status``, ``gasUsed`` and ``logs`` when the
+        transaction was mined.
+        """
+        record = self.entries.get(step)
+        if record and record["state"] in (DONE, FAILED):
+            return record
+        if record and record.get("hash"):
+            resumed = self._resume(record, sender)
+            if resumed is not None:
+                return resumed
+        if check is not None and check():
+            return self._write(step, DONE, reconciled=True)
+
+        nonce = cast.nonce(sender)
+        try:
+            raw = cast.mktx(private_key, to, sig, *args, nonce=nonce, value=value)
+        except cast.CastError as e:
+            # gas estimation reverted: nothing was sent, so a later run tries again
+            if "revert" not in str(e):
+                raise
+            return self._write(step, REJECTED, error=str(e), nonce=None, hash=None, raw=None)
+        record = self._write(step, PLANNED, nonce=nonce, hash=cast.keccak(raw), raw=raw, error=None)
+        return self._broadcast(record)
+
+    def _resume(self, record, sender):
+        receipt = cast.receipt(record["hash"])
+        if receipt is not None:
+            return self._finish(record, receipt)
+        if cast.nonce(sender, "latest") <= record["nonce"]:
+            return self._broadcast(record)
+        # the nonce went to some other transaction; fall back to state checks
+        return None
+
+    def _broadcast(self, record):
+        try:
+            cast.publish(record["raw"])
+        except cast.CastError as e:
+            if "already known" not in str(e):
+                raise
+        record = self._write(record["step"], SENT)
+        return self._finish(record, cast.wait_for_receipt(record["hash"]))
+
+    def _finish(self, record, receipt):
+        status = int(receipt["status"], 16)
+        return self._write(
+            record["step"],
+            DONE if status == 1 else FAILED,
+            status=status,
+            block=int(receipt["blockNumber"], 16),
+            gasUsed=int(receipt["gasUsed"], 16),
+            logs=[{"topics": log["topics"], "data": log["data"]} for log in receipt["logs"]],
+        )
+
+
+def require_deployed(journal, address):
+    """Refuse to resume against a chain that no longer has the journaled contracts."""
+    if cast.code(address) in ("", "0x"):
+        raise JournalError(
+            f"{journal.path} refers to {address}, which has no code on this chain; "
+            "the node was probably restarted. Rerun with --fresh."
+        )
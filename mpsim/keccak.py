@@ -0,0 +1,68 @@
+"""Pure-Python Keccak-256 (the pre-NIST padding Ethereum uses, unlike hashlib.sha3_256)."""
+
+_RC = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+_ROT = [
+    [0, 36, 3, 41, 18],
+    [1, 44, 10, 45, 2],
+    [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56],
+    [27, 20, 39, 8, 14],
+]
+_MASK = (1 << 64) - 1
+_RATE = 136
+
+
+# the state is a flat list of 25 lanes, lane (x, y) at index x + 5 * y;
+# _PI folds the rho rotations and the pi permutation into one table
+_PI = [(x + 5 * y, y + 5 * ((2 * x + 3 * y) % 5), _ROT[x][y]) for x in range(5) for y in range(5)]
+
+
+def _permute(a):
+    b = [0] * 25
+    for rc in _RC:
+        c0 = a[0] ^ a[5] ^ a[10] ^ a[15] ^ a[20]
+        c1 = a[1] ^ a[6] ^ a[11] ^ a[16] ^ a[21]
+        c2 = a[2] ^ a[7] ^ a[12] ^ a[17] ^ a[22]
+        c3 = a[3] ^ a[8] ^ a[13] ^ a[18] ^ a[23]
+        c4 = a[4] ^ a[9] ^ a[14] ^ a[19] ^ a[24]
+        d = (
+            c4 ^ (((c1 << 1) | (c1 >> 63)) & _MASK),
+            c0 ^ (((c2 << 1) | (c2 >> 63)) & _MASK),
+            c1 ^ (((c3 << 1) | (c3 >> 63)) & _MASK),
+            c2 ^ (((c4 << 1) | (c4 >> 63)) & _MASK),
+            c3 ^ (((c0 << 1) | (c0 >> 63)) & _MASK),
+        )
+        for src, dst, r in _PI:
+            v = a[src] ^ d[src % 5]
+            b[dst] = ((v << r) | (v >> (64 - r))) & _MASK if r else v
+        for y in (0, 5, 10, 15, 20):
+            b0, b1, b2, b3, b4 = b[y], b[y + 1], b[y + 2], b[y + 3], b[y + 4]
+            a[y] = b0 ^ (~b1 & b2)
+            a[y + 1] = b1 ^ (~b2 & b3)
+            a[y + 2] = b2 ^ (~b3 & b4)
+            a[y + 3] = b3 ^ (~b4 & b0)
+            a[y + 4] = b4 ^ (~b0 & b1)
+        a[0] ^= rc
+
+
+def keccak256(data):
+    if isinstance(data, str):
+        data = data.encode()
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\x00" * (-len(padded) % _RATE))
+    padded[-1] |= 0x80
+    state = [0] * 25
+    for off in range(0, len(padded), _RATE):
+        block = padded[off:off + _RATE]
+        for i in range(_RATE // 8):
+            state[i] ^= int.from_bytes(block[8 * i:8 * i + 8], "little")
+        _permute(state)
+    return b"".join(state[i].to_bytes(8, "little") for i in range(4))
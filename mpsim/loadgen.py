@@ -0,0 +1,455 @@
+"""Open-loop load generator for MPVoting.
+
+Requests are scheduled at a target rate (with a linear ramp-up) and fired from
+a worker pool without waiting for earlier ones to confirm, so a saturated node
+shows up as growing latency instead of a silently lower send rate. Latencies
+are measured from each request's *scheduled* time, which keeps a backed-up
+worker pool from hiding queueing delay.
+
+Against a running anvil with deployed contracts and minted MP tokens::
+
+    python -m mpsim.loadgen --voting $VOTING_ADDRESS --rate 50 --ramp 10 --duration 60
+    python -m mpsim.loadgen --voting $VOTING_ADDRESS --rate 200 --mining 2
+
+Setup (questions, prefilled votes for the claim traffic) runs closed-loop under
+automine before the measured phase starts.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import abi, accounts, codegen, eligibility, rpc
+from .config import ADMIN_ADDRESS, RPC_URL, VOTERS
+
+STAKE_WEI = 100 * 10**18
+CLAIM_WINDOW = 30
+VOTE_WINDOW = 7 * 24 * 3600
+GAS_HEADROOM = 1.3
+
+
+def max_gas(client, txs):
+    """Largest ``eth_estimateGas`` over *txs*, with headroom; txs that revert are skipped."""
+    results = client.batch([("eth_estimateGas", [tx]) for tx in txs])
+    estimates = [int(r, 16) for r in results if not isinstance(r, rpc.RPCError)]
+    if not estimates:
+        raise results[0]
+    return int(max(estimates) * GAS_HEADROOM)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    k = min(len(sorted_values) - 1, max(0, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def send_times(rate, ramp, duration):
+    """Scheduled offsets (seconds) of successive requests.
+
+    The instantaneous rate rises linearly from 0 to ``rate`` over ``ramp``
+    seconds and stays there until ``duration``.
+    """
+    ramp_count = rate * ramp / 2
+    n = 0
+    while True:
+        n += 1
+        if n <= ramp_count:
+            t = math.sqrt(2 * n * ramp / rate)
+        else:
+            t = ramp + (n - ramp_count) / rate
+        if t > duration:
+            return
+        yield t
+
+
+def expected_requests(rate, ramp, duration):
+    ramp = min(ramp, duration)
+    return int(rate * ramp / 2 + rate * (duration - ramp)) + 1
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("vote", "claim", "view"):
+            raise argparse.ArgumentTypeError(f"unknown traffic kind {kind!r}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def revert_reason(err):
+    """Best-effort ``require`` message from an RPC error."""
+    if isinstance(err.data, str) and err.data.startswith("0x"):
+        reason = abi.revert_reason(err.data)
+        if reason:
+            return reason
+    message = str(err)
+    prefix = "execution reverted: "
+    return message[message.index(prefix) + len(prefix):] if prefix in message else message
+
+
+class Workload:
+    """Hands out not-yet-used (question, voter) pairs to vote on or claim from."""
+
+    def __init__(self, voting, voters, vote_questions, claim_questions, seed=0, eligibility=None):
+        self.voting = voting
+        self.voters = voters
+        self._votes = iter([(q, v) for q in vote_questions for v in voters])
+        self._claims = iter([(q, v) for q in claim_questions for v in voters])
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.vote_questions = vote_questions
+        self.gas = {}
+        self.eligibility = eligibility
+        self.prefiltered = Counter()
+        self._mp = codegen.load().MPVoting
+
+    def release(self, tx):
+        """Hand a vote transaction the node rejected back to the roster, so it no longer counts as cast."""
+        if self.eligibility is None:
+            return
+        q, option = abi.decode(["uint256", "uint256"], "0x" + tx["data"][10:])
+        with self._lock:
+            self.eligibility.release([(q, option, tx["from"])])
+
+    def request(self, kind):
+        """Return ``(method, params)`` for one request of ``kind``, or None when used up."""
+        mp = self._mp
+        with self._lock:
+            if kind == "vote":
+                for q, voter in self._votes:
+                    option = self._rng.randrange(3)
+                    if self.eligibility is None:
+                        break
+                    accepted, rejected = self.eligibility.filter([(q, option, voter)])
+                    if accepted:
+                        break
+                    self.prefiltered[rejected[0][1]] += 1
+                else:
+                    return None
+                return "eth_sendTransaction", [{
+                    "from": voter,
+                    "to": self.voting,
+                    "value": hex(STAKE_WEI),
+                    "gas": hex(self.gas["vote"]),
+                    "data": mp.vote(q, option),
+                }]
+            if kind == "claim":
+                pair = next(self._claims, None)
+                if pair is None:
+                    return None
+                q, voter = pair
+                return "eth_sendTransaction", [{
+                    "from": voter,
+                    "to": self.voting,
+                    "gas": hex(self.gas["claim"]),
+                    "data": mp.claimStake(q),
+                }]
+            q = self._rng.choice(self.vote_questions)
+            voter = self._rng.choice(self.voters)
+            data = self._rng.choice([
+                mp.getAllVoteCounts(q),
+                mp.checkVote(q, voter),
+                mp.isValidMPVoter(voter),
+            ])
+            return "eth_call", [{"to": self.voting, "data": data}, "latest"]
+
+
+def prepare(client, voting, voters, n_vote_questions, n_claim_questions, prefilter=False):
+    """Create questions and a closed set of votes to claim from; returns a :class:`Workload`.
+
+    With ``prefilter`` the workload checks every vote against an event-sourced
+    MP roster (:mod:`mpsim.eligibility`) and skips the ones that would revert.
+    """
+    mp = codegen.load().MPVoting
+    client.batch([("anvil_impersonateAccount", [v]) for v in voters + [ADMIN_ADDRESS]])
+    client.call("evm_setAutomine", True)
+
+    now = int(client.call("eth_getBlockByNumber", "latest", False)["timestamp"], 16)
+    start = now + 5
+    first = mp.decode_questionCount(client.call("eth_call", {"to": voting, "data": mp.questionCount()}, "latest")) + 1
+    windows = [VOTE_WINDOW] * n_vote_questions + [CLAIM_WINDOW] * n_claim_questions
+    rpc.send_all(client, [
+        {"from": ADMIN_ADDRESS, "to": voting,
+         "data": mp.createQuestion(f"Load test question {first + i}", start, start + w)}
+        for i, w in enumerate(windows)
+    ])
+    vote_questions = list(range(first, first + n_vote_questions))
+    claim_questions = list(range(first + n_vote_questions, first + len(windows)))
+
+    rpc.warp(client, start)
+    rng = random.Random(1)
+    rpc.send_all(client, [
+        {"from": v, "to": voting, "value": hex(STAKE_WEI),
+         "data": mp.vote(q, rng.randrange(3))}
+        for q in claim_questions for v in voters
+    ])
+    rpc.warp(client, start + CLAIM_WINDOW + 1)
+    if claim_questions:
+        rpc.send_all(client, [{"from": ADMIN_ADDRESS, "to": voting, "data": mp.closeQuestions(claim_questions)}])
+
+    roster = None
+    if prefilter:
+        roster = eligibility.Eligibility(client, voting)
+        roster.sync()
+    workload = Workload(voting, voters, vote_questions, claim_questions, eligibility=roster)
+    # isValidMPVoter walks the token ids up to the voter's, so the cost depends
+    # on who votes: size the gas limit for the most expensive voter
+    workload.gas["vote"] = max_gas(client, [
+        {"from": v, "to": voting, "value": hex(STAKE_WEI), "data": mp.vote(vote_questions[0], 0)}
+        for v in voters
+    ])
+    if claim_questions:
+        workload.gas["claim"] = max_gas(client, [
+            {"from": v, "to": voting, "data": mp.claimStake(claim_questions[0])}
+            for v in voters
+        ])
+    return workload
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.scheduled = Counter()
+        self.exhausted = Counter()
+        self.submitted = {}  # tx hash -> (kind, scheduled time, tx)
+        self.submit_lag = []
+        self.submit_errors = Counter()
+        self.view_latency = []
+        self.view_errors = Counter()
+        self.seen = {}  # tx hash -> (block number, time first seen in a block)
+        self.blocks = []  # (number, timestamp, tx count)
+
+
+def _fire(url, workload, recorder, kind, scheduled):
+    request = workload.request(kind)
+    with recorder.lock:
+        recorder.scheduled[kind] += 1
+        if request is None:
+            recorder.exhausted[kind] += 1
+            return
+    method, params = request
+    client = rpc.local(url)
+    try:
+        result = client.call(method, *params)
+        error = None
+    except rpc.RPCError as e:
+        error = revert_reason(e)
+        if kind == "vote":
+            workload.release(params[0])
+    except OSError as e:
+        # a timeout or dropped connection is the node failing under load; the
+        # vote may still have gone through, so it is not released
+        error = f"transport error ({type(e).__name__})"
+    now = time.monotonic()
+    with recorder.lock:
+        if method == "eth_call":
+            recorder.view_latency.append(now - scheduled)
+            if error:
+                recorder.view_errors[error] += 1
+        elif error:
+            recorder.submit_errors[f"{kind}: {error}"] += 1
+        else:
+            recorder.submitted[result] = (kind, scheduled, params[0])
+            recorder.submit_lag.append(now - scheduled)
+
+
+def _watch_blocks(url, recorder, stop):
+    client = rpc.Client(url)
+    next_block = int(client.call("eth_blockNumber"), 16) + 1
+    while not stop.is_set():
+        head = int(client.call("eth_blockNumber"), 16)
+        if head < next_block:
+            time.sleep(0.005)
+            continue
+        now = time.monotonic()
+        for block in client.batch([("eth_getBlockByNumber", [hex(n), False]) for n in range(next_block, head + 1)]):
+            number = int(block["number"], 16)
+            with recorder.lock:
+                recorder.blocks.append((number, int(block["timestamp"], 16), len(block["transactions"])))
+                for h in block["transactions"]:
+                    recorder.seen.setdefault(h, (number, now))
+        next_block = head + 1
+    client.close()
+
+
+def run(url, workload, rate, ramp, duration, mix, workers=64, drain_timeout=60, seed=0):
+    recorder = Recorder()
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    stop = threading.Event()
+    watcher = threading.Thread(target=_watch_blocks, args=(url, recorder, stop), daemon=True)
+    watcher.start()
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for offset in send_times(rate, ramp, duration):
+            delay = start + offset - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_fire, url, workload, recorder, rng.choices(kinds, weights)[0], start + offset)
+    send_end = time.monotonic()
+
+    deadline = send_end + drain_timeout
+    while time.monotonic() < deadline:
+        with recorder.lock:
+            if all(h in recorder.seen for h in recorder.submitted):
+                break
+        time.sleep(0.05)
+    stop.set()
+    watcher.join()
+    return recorder, start, send_end
+
+
+def collect(url, recorder, batch_size=200):
+    """Fetch receipts for everything submitted and replay failures for their revert reasons."""
+    vote_cast = codegen.load().MPVoting.TOPICS["VoteCast"]
+    client = rpc.Client(url)
+    hashes = [h for h in recorder.submitted if h in recorder.seen]
+    receipts = {}
+    for i in range(0, len(hashes), batch_size):
+        chunk = hashes[i:i + batch_size]
+        receipts.update(zip(chunk, client.batch([("eth_getTransactionReceipt", [h]) for h in chunk])))
+
+    reverts = Counter()
+    votes_per_block = Counter()
+    for h, receipt in receipts.items():
+        kind, _, tx = recorder.submitted[h]
+        if int(receipt["status"], 16) == 1:
+            votes_per_block[int(receipt["blockNumber"], 16)] += sum(1 for log in receipt["logs"] if log["topics"][0] == vote_cast)
+            continue
+        call = {k: tx[k] for k in ("from", "to", "data", "value") if k in tx}
+        try:
+            client.call("eth_call", call, receipt["blockNumber"])
+            reverts[f"{kind}: reverted (no reason on replay)"] += 1
+        except rpc.RPCError as e:
+            reverts[f"{kind}: {revert_reason(e)}"] += 1
+    client.close()
+    return receipts, reverts, votes_per_block
+
+
+def report(recorder, start, send_end, reverts, votes_per_block, args, prefiltered=None):
+    elapsed = send_end - start
+    latency = defaultdict(list)
+    last_confirm = send_end
+    for h, (kind, scheduled, _) in recorder.submitted.items():
+        if h in recorder.seen:
+            seen_at = recorder.seen[h][1]
+            latency[kind].append(seen_at - scheduled)
+            last_confirm = max(last_confirm, seen_at)
+    confirmed = sum(len(v) for v in latency.values())
+
+    lines = [
+        "=== LOAD TEST REPORT ===",
+        f"Target: {args.rate} req/s, ramp {args.ramp}s, duration {args.duration}s, mining: {args.mining}",
+        f"Scheduled: {sum(recorder.scheduled.values())} {dict(recorder.scheduled)}",
+    ]
+    if recorder.exhausted:
+        lines.append(f"Skipped (workload used up): {dict(recorder.exhausted)}")
+    if prefiltered:
+        lines.append(f"Votes dropped before sending: {dict(prefiltered)}")
+    lines += [
+        f"Submitted transactions: {len(recorder.submitted)}   confirmed: {confirmed}   "
+        f"unconfirmed: {len(recorder.submitted) - confirmed}",
+        f"Achieved send TPS: {len(recorder.submitted) / elapsed:.1f}   "
+        f"confirmed TPS: {confirmed / (last_confirm - start):.1f}   "
+        f"view calls/s: {len(recorder.view_latency) / elapsed:.1f}",
+        "",
+        f"{'latency (ms)':<16}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}",
+    ]
+    rows = [(f"{k} confirm", sorted(v)) for k, v in sorted(latency.items())]
+    rows.append(("tx submit", sorted(recorder.submit_lag)))
+    rows.append(("view", sorted(recorder.view_latency)))
+    for label, values in rows:
+        cells = [percentile(values, p) * 1000 for p in (50, 90, 99, 100)]
+        lines.append(f"{label:<16}{len(values):>8}" + "".join(f"{c:>10.1f}" for c in cells))
+
+    failures = reverts + recorder.submit_errors + Counter({f"view: {k}": v for k, v in recorder.view_errors.items()})
+    lines += ["", "Reverts / rejections:" if failures else "Reverts / rejections: none"]
+    lines += [f"  {count:>6}  {reason}" for reason, count in failures.most_common()]
+
+    blocks = recorder.blocks
+    if blocks:
+        counts = [votes_per_block.get(number, 0) for number, _, _ in blocks]
+        lines += [
+            "",
+            f"Blocks mined during run: {len(blocks)}   txs/block mean {sum(b[2] for b in blocks) / len(blocks):.1f}",
+            f"Votes per block: mean {sum(counts) / len(counts):.1f}   max {max(counts)}",
+        ]
+    print("\n".join(lines))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "scheduled": recorder.scheduled,
+                "submitted": len(recorder.submitted),
+                "confirmed": confirmed,
+                "elapsed": elapsed,
+                "latency": {k: sorted(v) for k, v in latency.items()},
+                "view_latency": sorted(recorder.view_latency),
+                "failures": failures,
+                "prefiltered": prefiltered or {},
+                "votes_per_block": {str(n): votes_per_block.get(n, 0) for n, _, _ in blocks},
+            }, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test against MPVoting on a local node")
+    parser.add_argument("--rpc-url", default=RPC_URL)
+    parser.add_argument("--voting", default=os.environ.get("VOTING_ADDRESS"), help="MPVoting address (default: $VOTING_ADDRESS)")
+    parser.add_argument("--rate", type=float, default=20, help="target requests per second")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds to ramp up to the target rate")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load, including the ramp")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("vote=6,claim=1,view=3"),
+                        help="traffic weights (default: vote=6,claim=1,view=3)")
+    parser.add_argument("--mining", default="auto", help="'auto' for automine or a block interval in seconds")
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--json", metavar="PATH", help="also write raw results as JSON")
+    parser.add_argument("--accounts", type=int, metavar="N",
+                        help="vote from N provisioned accounts (see mpsim.accounts) instead of the anvil MPs")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="skip votes that the event-sourced MP roster says would revert")
+    args = parser.parse_args()
+    if not args.voting:
+        parser.error("--voting or $VOTING_ADDRESS is required")
+
+    n_voters = args.accounts or len(VOTERS)
+    total = expected_requests(args.rate, args.ramp, args.duration)
+    share = {k: w / sum(args.mix.values()) for k, w in args.mix.items()}
+    n_vote_questions = max(1, math.ceil(total * share.get("vote", 0) * 1.1 / n_voters))
+    n_claim_questions = math.ceil(total * share.get("claim", 0) * 1.1 / n_voters)
+
+    client = rpc.Client(args.rpc_url)
+    # every voter may stake once per question, plus some gas money
+    ether = (n_vote_questions + n_claim_questions) * STAKE_WEI // 10**18 + 10
+    if args.accounts:
+        print(f"Provisioning {args.accounts} MP accounts with {ether} ETH each...")
+        voters = [address for _, address, _ in accounts.provision(client, args.accounts, args.voting, ether=ether)]
+    else:
+        voters = [address for _, address, _ in VOTERS]
+        print(f"Setting the balance of the {len(voters)} anvil MPs to {ether} ETH...")
+        accounts.fund(client, voters, ether * 10**18)
+    print(f"Preparing {n_vote_questions} questions to vote on and {n_claim_questions} to claim from...")
+    workload = prepare(client, args.voting, voters, n_vote_questions, n_claim_questions, args.prefilter)
+    if args.mining != "auto":
+        client.call("evm_setIntervalMining", int(args.mining))
+
+    print(f"Running for {args.duration}s...")
+    try:
+        recorder, start, send_end = run(args.rpc_url, workload, args.rate, args.ramp, args.duration, args.mix, args.workers)
+    finally:
+        if args.mining != "auto":
+            client.call("evm_setIntervalMining", 0)
+            client.call("evm_setAutomine", True)
+    _, reverts, votes_per_block = collect(args.rpc_url, recorder)
+    report(recorder, start, send_end, reverts, votes_per_block, args, workload.prefiltered)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Relay EIP-712 signed votes to ``MPVoting.voteBatchWithSig`` in gas-sized batches.
+
+MPs sign ``Vote(questionId, optionIndex, voter)`` off-chain and stake from
+their ``deposit()`` balance, so any account can submit many votes in one
+transaction. The relayer estimates every vote on its own (one JSON-RPC batch
+of ``eth_estimateGas``), drops the ones that would revert, packs the rest up
+to a fraction of the block gas limit and bisects any batch that still fails
+to estimate as a whole (e.g. two votes draining the same deposit). Given an
+:class:`~mpsim.eligibility.Eligibility`, votes that would fail on the MP
+roster, the voting window or a repeat vote are dropped locally first.
+
+Against a running anvil with deployed contracts and minted MP tokens::
+
+    python -m mpsim.relayer --voting $VOTING_ADDRESS --questions 20
+
+creates questions, deposits stakes for the anvil MP accounts, signs every
+vote, relays them and reports votes per block.
+"""
+import argparse
+import os
+from collections import Counter
+
+from . import abi, accounts, codegen, eligibility, rpc
+from .config import ADMIN_ADDRESS, RPC_URL, VOTERS
+from .keccak import keccak256
+from .loadgen import GAS_HEADROOM, STAKE_WEI, VOTE_WINDOW, revert_reason
+from .secp256k1 import sign, signature_bytes
+
+DOMAIN_TYPEHASH = keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
+VOTE_TYPEHASH = keccak256("Vote(uint256 questionId,uint256 optionIndex,address voter)")
+
+
+def domain_separator(chain_id, voting):
+    return keccak256(abi.encode(
+        ["bytes32", "bytes32", "bytes32", "uint256", "address"],
+        [DOMAIN_TYPEHASH, keccak256("MPVoting"), keccak256("1"), chain_id, voting],
+    ))
+
+
+def vote_digest(domain, question_id, option_index, voter):
+    struct_hash = keccak256(abi.encode(
+        ["bytes32", "uint256", "uint256", "address"],
+        [VOTE_TYPEHASH, question_id, option_index, voter],
+    ))
+    return keccak256(b"\x19\x01" + domain + struct_hash)
+
+
+def sign_vote(private_key, domain, question_id, option_index, voter):
+    """65-byte ``r || s || v`` signature over one vote."""
+    return signature_bytes(*sign(private_key, vote_digest(domain, question_id, option_index, voter)))
+
+
+class Relayer:
+    """Queues signed votes and submits them from ``sender`` (an unlocked account)."""
+
+    def __init__(self, client, voting, sender, fill=0.9, eligibility=None):
+        self.client = client
+        self.voting = voting
+        self.sender = sender
+        self.eligibility = eligibility
+        self._bindings = codegen.load()
+        block = client.call("eth_getBlockByNumber", "latest", False)
+        self.block_gas_limit = int(block["gasLimit"], 16)
+        self.gas_limit = int(self.block_gas_limit * fill)
+        self.domain = domain_separator(int(client.call("eth_chainId"), 16), voting)
+        onchain = client.call("eth_call", {"to": voting, "data": self._bindings.MPVoting.domainSeparator()}, "latest")
+        if onchain != "0x" + self.domain.hex():
+            raise ValueError(f"EIP-712 domain mismatch for {voting}: contract has {onchain}")
+        self.pending = []
+        self.rejected = []
+
+    def signed(self, private_key, question_id, option_index, voter):
+        """A ``SignedVote`` for the contract, signed with ``private_key``."""
+        signature = sign_vote(private_key, self.domain, question_id, option_index, voter)
+        return self._bindings.SignedVote(question_id, option_index, voter, signature)
+
+    def add(self, vote):
+        self.pending.append(vote)
+
+    def _reject(self, vote, reason):
+        self.rejected.append((vote, reason))
+        if self.eligibility is not None:
+            self.eligibility.release([vote])
+
+    def _tx(self, votes):
+        return {"from": self.sender, "to": self.voting, "data": self._bindings.MPVoting.voteBatchWithSig(votes)}
+
+    def estimate(self, batches):
+        """``eth_estimateGas`` of each list of votes in one round trip; failures come back as RPCError."""
+        results = self.client.batch([("eth_estimateGas", [self._tx(b), "pending"]) for b in batches])
+        return [r if isinstance(r, rpc.RPCError) else int(r, 16) for r in results]
+
+    def plan(self):
+        """Split the queue into batches that fit ``gas_limit``, rejecting votes that revert alone."""
+        votes, self.pending = self.pending, []
+        if self.eligibility is not None:
+            votes, rejected = self.eligibility.filter(votes)
+            self.rejected += rejected
+            if not votes:
+                return []
+        base, *costs = self.estimate([[]] + [[v] for v in votes])
+        if isinstance(base, rpc.RPCError):
+            raise base
+        batches, current, used = [], [], base
+        for vote, cost in zip(votes, costs):
+            if isinstance(cost, rpc.RPCError):
+                self._reject(vote, revert_reason(cost))
+                continue
+            # single-vote estimates pay for cold storage the rest of a batch reuses, so this overshoots
+            marginal = cost - base
+            if current and used + marginal > self.gas_limit:
+                batches.append(current)
+                current, used = [], base
+            current.append(vote)
+            used += marginal
+        if current:
+            batches.append(current)
+        return batches
+
+    def _checked(self, batch):
+        """``[(votes, gas)]`` for ``batch``, halved until every part estimates cleanly."""
+        gas = self.estimate([batch])[0]
+        if not isinstance(gas, rpc.RPCError):
+            return [(batch, gas)]
+        if len(batch) == 1:
+            self._reject(batch[0], revert_reason(gas))
+            return []
+        mid = len(batch) // 2
+        return self._checked(batch[:mid]) + self._checked(batch[mid:])
+
+    def flush(self):
+        """Submit everything queued and return the receipts of the batch transactions."""
+        sent = []
+        for batch in self.plan():
+            for votes, gas in self._checked(batch):
+                tx = self._tx(votes)
+                tx["gas"] = hex(min(int(gas * GAS_HEADROOM), self.block_gas_limit))
+                sent.append((votes, self.client.call("eth_sendTransaction", tx)))
+        receipts = []
+        for votes, h in sent:
+            receipt = rpc.wait_for_receipt(self.client, h)
+            if int(receipt["status"], 16) != 1:
+                for vote in votes:
+                    self._reject(vote, "batch reverted")
+            receipts.append(receipt)
+        return receipts
+
+
+def votes_per_block(receipts, vote_cast_topic):
+    counts = Counter()
+    for receipt in receipts:
+        if int(receipt["status"], 16) == 1:
+            counts[int(receipt["blockNumber"], 16)] += sum(1 for log in receipt["logs"] if log["topics"][0] == vote_cast_topic)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sign votes off-chain and relay them in batches")
+    parser.add_argument("--rpc-url", default=RPC_URL)
+    parser.add_argument("--voting", default=os.environ.get("VOTING_ADDRESS"), help="MPVoting address (default: $VOTING_ADDRESS)")
+    parser.add_argument("--questions", type=int, default=10, help="questions to create and vote on")
+    parser.add_argument("--fill", type=float, default=0.9, help="fraction of the block gas limit per batch")
+    parser.add_argument("--accounts", type=int, metavar="N",
+                        help="sign for N provisioned accounts (see mpsim.accounts) instead of the anvil MPs")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="estimate every vote on the node instead of checking the MP roster locally first")
+    args = parser.parse_args()
+    if not args.voting:
+        parser.error("--voting or $VOTING_ADDRESS is required")
+
+    client = rpc.Client(args.rpc_url)
+    mp = codegen.load().MPVoting
+    if args.accounts:
+        ether = args.questions * STAKE_WEI // 10**18 + 10
+        mps = accounts.provision(client, args.accounts, args.voting, ether=ether)
+    else:
+        mps = VOTERS
+    voters = [address for _, address, _ in mps]
+    client.batch([("anvil_impersonateAccount", [a]) for a in voters + [ADMIN_ADDRESS]])
+    client.call("evm_setAutomine", True)
+
+    now = int(client.call("eth_getBlockByNumber", "latest", False)["timestamp"], 16)
+    start = now + 5
+    first = mp.decode_questionCount(client.call("eth_call", {"to": args.voting, "data": mp.questionCount()}, "latest")) + 1
+    print(f"Creating {args.questions} questions and depositing {args.questions * 100} ETH per MP...")
+    rpc.send_all(client, [
+        {"from": ADMIN_ADDRESS, "to": args.voting,
+         "data": mp.createQuestion(f"Relayed question {first + i}", start, start + VOTE_WINDOW)}
+        for i in range(args.questions)
+    ] + [
+        {"from": a, "to": args.voting, "value": hex(STAKE_WEI * args.questions), "data": mp.deposit()}
+        for a in voters
+    ])
+    rpc.warp(client, start)
+
+    roster = None
+    if not args.no_prefilter:
+        roster = eligibility.Eligibility(client, args.voting)
+        roster.sync()
+    relayer = Relayer(client, args.voting, ADMIN_ADDRESS, fill=args.fill, eligibility=roster)
+    for q in range(first, first + args.questions):
+        for i, (key, address, _) in enumerate(mps):
+            relayer.add(relayer.signed(key, q, (q + i) % 3, address))
+    total = len(relayer.pending)
+    print(f"Relaying {total} signed votes (batch gas budget {relayer.gas_limit})...")
+    receipts = relayer.flush()
+
+    per_block = votes_per_block(receipts, mp.TOPICS["VoteCast"])
+    failed = sum(1 for r in receipts if int(r["status"], 16) != 1)
+    print("\n=== RELAY REPORT ===")
+    print(f"Votes signed: {total}, recorded: {sum(per_block.values())}, rejected: {len(relayer.rejected)}")
+    print(f"Batch transactions: {len(receipts)} ({failed} reverted)")
+    if per_block:
+        print(f"Votes per block: max {max(per_block.values())}, mean {sum(per_block.values()) / len(per_block):.1f} "
+              f"(one per transaction with vote())")
+        gas = sum(int(r["gasUsed"], 16) for r in receipts)
+        print(f"Gas per vote: {gas / sum(per_block.values()):.0f}")
+    for reason, n in Counter(reason for _, reason in relayer.rejected).most_common():
+        print(f"  rejected x{n}: {reason}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
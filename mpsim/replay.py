@@ -0,0 +1,505 @@
+"""Record an MPVoting session from its events and replay it against fresh contracts.
+
+``capture`` reads the ``QuestionCreated``, ``VoteCast``, ``QuestionClosed``,
+``QuestionClosedWithDraw``, ``StakeReturned``, ``VaultEarnings`` and
+``QuestionSettled`` logs of a deployment, the ``MPToken`` mints, status
+changes, transfers and burns, the gas and block time of the transactions that
+emitted them and the MP token roster as it stood before the first captured
+block, and writes them to a gzipped JSON file::
+
+    python -m mpsim.replay capture --voting $VOTING_ADDRESS -o session.replay.gz
+
+``run`` deploys MPTokenFactory and MPVoting from ``out/`` (or another build
+with ``--out``), mints the roster in the same order and re-sends the session,
+token history included, block by block with automine off and every sender
+impersonated. Each block is mined at its recorded timestamp plus one fixed
+offset, so voting windows and token expirations line up. The report compares gas per kind of call, question outcomes and payouts::
+
+    python -m mpsim.replay run session.replay.gz --out ../new-build/out
+
+Every event maps back to one call (``VoteCast`` -> ``vote``,
+``QuestionClosed`` -> ``closeQuestion``, ...), so a recorded
+``voteBatchWithSig`` is replayed as plain ``vote`` calls from its voters, and
+calls recovered from one transaction are compared with its gas as a group.
+An MP deactivated or burned partway through the session is deactivated or
+burned at the same point of the replay, so their earlier votes still count.
+
+Logs are decoded and calls encoded with the :mod:`mpsim.codegen` bindings:
+the repo's bindings for ``capture``, bindings generated from the ``--out``
+build for ``run``, so a changed ABI in the build under test is picked up.
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from . import abi, codegen, fastdecode, rpc
+from .codegen import OUT_DIR
+from .config import ADMIN_ADDRESS, RPC_URL
+from .loadgen import revert_reason
+
+FORMAT = 2
+EVENTS = [
+    "QuestionCreated", "VoteCast", "QuestionClosed", "QuestionClosedWithDraw",
+    "StakeReturned", "VaultEarnings", "QuestionSettled",
+]
+TOKEN_EVENTS = ["Transfer", "MPTokenMinted", "MPStatusChanged"]
+FUNCTIONS = {
+    "create": ("MPVoting", "createQuestion"),
+    "vote": ("MPVoting", "vote"),
+    "close": ("MPVoting", "closeQuestion"),
+    "claim": ("MPVoting", "claimStake"),
+    "settle": ("MPVoting", "settleStakes"),
+    "mint": ("MPTokenFactory", "createMPToken"),
+    "status": ("MPTokenFactory", "updateMPTokenStatus"),
+    "burn": ("MPTokenFactory", "destroyExpiredMPToken"),
+    "transfer": ("MPToken", "transferFrom"),
+}
+TOKEN_CALLS = {"mint", "status", "burn"}
+ZERO_ADDRESS = "0x" + "00" * 20
+DEAD = "0x000000000000000000000000000000000000dead"
+SETUP_MARGIN = 60
+GAS_FACTOR = 3
+GAS_EXTRA = 100_000
+FUNDS = hex(10**24)
+
+
+def decode_event(contract, log, names=EVENTS):
+    """``[name, *fields]`` for a log of one of ``names``, decoded with the ``contract`` bindings, or None."""
+    event = contract.decode_log(log)
+    if event is None or type(event).__name__ not in names:
+        return None
+    return [type(event).__name__, *event]
+
+
+def calls_for(sender, events):
+    """The calls that emitted ``events`` in one transaction from ``sender``, as ``[fn, from, questionId, *args]``.
+
+    Token calls carry no question id: ``["mint", from, None, tokenId, owner, name, party, constituency, year,
+    expiration]`` (``year`` is not in the event and starts out None), ``["status", from, None, tokenId, active]``,
+    ``["burn", from, None, tokenId]`` and ``["transfer", owner, None, tokenId, to]``.
+    """
+    calls, minted_to = [], {}
+    for name, *fields in events:
+        if name == "QuestionCreated":
+            q, question, start, end, _ = fields
+            calls.append(["create", sender, q, question, start, end])
+        elif name == "VoteCast":
+            q, voter, option, stake = fields
+            calls.append(["vote", voter, q, option, stake])
+        elif name in ("QuestionClosed", "QuestionClosedWithDraw"):
+            calls.append(["close", sender, fields[0]])
+        elif name == "StakeReturned" and fields[1] == sender:
+            calls.append(["claim", sender, fields[0]])
+        elif name == "QuestionSettled":
+            calls.append(["settle", sender, fields[0]])
+        elif name == "Transfer":
+            owner, to, token_id = fields
+            if owner == ZERO_ADDRESS:
+                minted_to[token_id] = to
+            elif to == ZERO_ADDRESS:
+                calls.append(["burn", sender, None, token_id])
+            else:
+                calls.append(["transfer", owner, None, token_id, to])
+        elif name == "MPTokenMinted":
+            token_id, mp_name, party, constituency, expiration = fields
+            calls.append(["mint", sender, None, token_id, minted_to.get(token_id), mp_name, party, constituency, None, expiration])
+        elif name == "MPStatusChanged":
+            calls.append(["status", sender, None, *fields])
+    return calls
+
+
+def _batch(client, calls, size=500):
+    results = []
+    for i in range(0, len(calls), size):
+        results += client.batch(calls[i:i + size])
+    return results
+
+
+def _view(client, contract, to, fn, *args, block="latest"):
+    return getattr(contract, f"decode_{fn}")(client.call("eth_call", {"to": to, "data": getattr(contract, fn)(*args)}, block))
+
+
+def roster(client, voting, b, block="latest"):
+    """Every MP token at ``block`` in id order as ``[owner, name, party, constituency, year, active, expiration]``.
+
+    Burned tokens have no owner or data and come back as ``[None, "", "", "", 0, False, 0]``.
+    """
+    factory = _view(client, b.MPVoting, voting, "mpTokenFactory")
+    token = _view(client, b.MPVoting, voting, "mpToken")
+    count = _view(client, b.MPTokenFactory, factory, "getMPTokenCount", block=block)
+    ids = range(1, count + 1)
+    owners = _batch(client, [("eth_call", [{"to": token, "data": b.MPToken.ownerOf(i)}, block]) for i in ids])
+    data = _batch(client, [("eth_call", [{"to": factory, "data": b.MPTokenFactory.getMPTokenData(i)}, block]) for i in ids])
+    out = []
+    for owner, d in zip(owners, data):
+        if isinstance(owner, rpc.RPCError) or isinstance(d, rpc.RPCError):
+            out.append([None, "", "", "", 0, False, 0])
+        else:
+            out.append([b.MPToken.decode_ownerOf(owner), *b.MPTokenFactory.decode_getMPTokenData(d)])
+    return out
+
+
+def capture(client, voting, from_block=0, to_block=None, step=5000):
+    """Read a session from the chain; returns the replay document."""
+    b = codegen.load()
+    mp = b.MPVoting
+    factory = _view(client, mp, voting, "mpTokenFactory").lower()
+    token = _view(client, mp, voting, "mpToken").lower()
+    if to_block is None:
+        to_block = int(client.call("eth_blockNumber"), 16)
+    logs = []
+    for lo in range(from_block, to_block + 1, step):
+        logs += client.call("eth_getLogs", {
+            "address": [voting, token], "fromBlock": hex(lo), "toBlock": hex(min(lo + step - 1, to_block)),
+            "topics": [[mp.TOPICS[name] for name in EVENTS] + [b.MPToken.TOPICS[name] for name in TOKEN_EVENTS]],
+        })
+    logs.sort(key=lambda log: (int(log["blockNumber"], 16), int(log["transactionIndex"], 16), int(log["logIndex"], 16)))
+
+    votes = [log for log in logs if log["topics"][0] == mp.TOPICS["VoteCast"]]
+    decoded = {id(log): ["VoteCast", *fields] for log, *fields in zip(votes, *fastdecode.vote_cast_logs(votes))}
+    events = defaultdict(list)
+    for log in logs:
+        if log["address"].lower() == token:
+            event = decode_event(b.MPToken, log, TOKEN_EVENTS)
+        else:
+            event = decoded.get(id(log)) or decode_event(mp, log)
+        events[log["transactionHash"]].append(event)
+    hashes = list(events)
+    receipts = _batch(client, [("eth_getTransactionReceipt", [h]) for h in hashes])
+    numbers = sorted({int(r["blockNumber"], 16) for r in receipts})
+    timestamps = {
+        n: int(b["timestamp"], 16)
+        for n, b in zip(numbers, _batch(client, [("eth_getBlockByNumber", [hex(n), False]) for n in numbers]))
+    }
+    blocks = defaultdict(list)
+    mints = []
+    for h, r in zip(hashes, receipts):
+        number = int(r["blockNumber"], 16)
+        calls = calls_for(r["from"].lower(), events[h])
+        mints += [(number, c) for c in calls if c[0] == "mint"]
+        blocks[number].append({"gas": int(r["gasUsed"], 16), "calls": calls, "events": events[h]})
+    # MPTokenMinted leaves out the election year; read it back as of the minting block
+    data = _batch(client, [
+        ("eth_call", [{"to": factory, "data": b.MPTokenFactory.getMPTokenData(c[3])}, hex(n)]) for n, c in mints
+    ])
+    for (_, call), d in zip(mints, data):
+        call[8] = 0 if isinstance(d, rpc.RPCError) else b.MPTokenFactory.decode_getMPTokenData(d).electionYear
+    return {
+        "format": FORMAT,
+        "voting": voting,
+        "chain_id": int(client.call("eth_chainId"), 16),
+        # the token history from from_block on is part of the blocks
+        "roster": roster(client, voting, b, hex(from_block - 1)) if from_block > 0 else [],
+        "blocks": [[n, timestamps[n], blocks[n]] for n in numbers],
+    }
+
+
+def save(session, path):
+    with gzip.open(path, "wt") as f:
+        json.dump(session, f, separators=(",", ":"))
+
+
+def load(path):
+    with gzip.open(path, "rt") as f:
+        session = json.load(f)
+    if session.get("format") != FORMAT:
+        raise ValueError(f"{path}: unsupported replay format {session.get('format')}")
+    return session
+
+
+def deploy(client, out_dir, name, types=(), args=()):
+    artifact = json.loads((Path(out_dir) / f"{name}.sol" / f"{name}.json").read_text())
+    data = artifact["bytecode"]["object"] + abi.encode(types, args).hex()
+    tx_hash = client.call("eth_sendTransaction", {"from": ADMIN_ADDRESS, "data": data})
+    return rpc.wait_for_receipt(client, tx_hash)["contractAddress"]
+
+
+def _latest_timestamp(client):
+    return int(client.call("eth_getBlockByNumber", "latest", False)["timestamp"], 16)
+
+
+def _setup(client, session, out_dir, b):
+    """Deploy fresh contracts, mint the roster and unlock every sender.
+
+    Returns ``({contract name: address}, offset)``.
+    """
+    client.call("evm_setAutomine", True)
+    factory = deploy(client, out_dir, "MPTokenFactory")
+    voting = deploy(client, out_dir, "MPVoting", ["address"], [factory])
+    token = _view(client, b.MPVoting, voting, "mpToken")
+    admin = ADMIN_ADDRESS.lower()
+    calls = [c for _, _, txs in session["blocks"] for tx in txs for c in tx["calls"]]
+    senders = sorted({c[1] for c in calls} | {admin})
+    _batch(client, [("anvil_impersonateAccount", [a]) for a in senders])
+    _batch(client, [("anvil_setBalance", [a, FUNDS]) for a in senders])
+
+    now = _latest_timestamp(client)
+    first = session["blocks"][0][1] if session["blocks"] else now
+    offset = now + len(session["roster"]) + SETUP_MARGIN - first
+    txs = [
+        {"from": ADMIN_ADDRESS, "to": voting, "data": b.MPVoting.addAdmin(a)}
+        for a in sorted({c[1] for c in calls if c[0] in ("create", "settle")} - {admin})
+    ]
+    txs += [
+        {"from": ADMIN_ADDRESS, "to": factory, "data": b.MPTokenFactory.addAdmin(a)}
+        for a in sorted({c[1] for c in calls if c[0] in TOKEN_CALLS} - {admin})
+    ]
+    for token_id, (owner, name, party, constituency, year, active, expiration) in enumerate(session["roster"], 1):
+        # a token that expired before the session cannot be minted expired; mint it inactive instead
+        if expiration + offset <= now + SETUP_MARGIN:
+            expiration, active = now + 10 * SETUP_MARGIN - offset, False
+        txs.append({"from": ADMIN_ADDRESS, "to": factory, "data": b.MPTokenFactory.createMPToken(
+            owner or DEAD, name, party, constituency, year, expiration + offset)})
+        if not active:
+            txs.append({"from": ADMIN_ADDRESS, "to": factory, "data": b.MPTokenFactory.updateMPTokenStatus(token_id, False)})
+    rpc.send_all(client, txs)
+    return {"MPVoting": voting, "MPTokenFactory": factory, "MPToken": token}, offset
+
+
+def _request(b, contracts, call, qmap, offset, gas):
+    fn, sender, q, *rest = call
+    if fn == "create":
+        question, start, end = rest
+        args = [question, start + offset, end + offset]
+    elif fn == "vote":
+        args = [qmap[q], rest[0]]
+    elif fn == "mint":
+        _, owner, name, party, constituency, year, expiration = rest
+        args = [owner or DEAD, name, party, constituency, year, expiration + offset]
+    elif fn == "transfer":
+        token_id, to = rest
+        args = [sender, to, token_id]
+    elif fn in TOKEN_CALLS:
+        args = rest
+    else:
+        args = [qmap[q]]
+    contract, function = FUNCTIONS[fn]
+    tx = {"from": sender, "to": contracts[contract], "data": getattr(getattr(b, contract), function)(*args), "gas": hex(gas)}
+    if fn == "vote":
+        tx["value"] = hex(rest[1])
+    return tx
+
+
+def _mine(client, hashes, timestamp):
+    """Mine at ``timestamp`` until every sent transaction has a receipt; returns ``(receipts, last timestamp)``."""
+    receipts = [None] * len(hashes)
+    while True:
+        client.call("evm_setNextBlockTimestamp", timestamp)
+        client.call("evm_mine")
+        missing = [i for i, h in enumerate(hashes) if receipts[i] is None and not isinstance(h, rpc.RPCError)]
+        for i, r in zip(missing, client.batch([("eth_getTransactionReceipt", [hashes[i]]) for i in missing])):
+            receipts[i] = r
+        if all(r is not None or isinstance(h, rpc.RPCError) for h, r in zip(hashes, receipts)):
+            return receipts, timestamp
+        timestamp += 1
+
+
+def replay(client, session, out_dir=OUT_DIR):
+    """Re-execute ``session`` on freshly deployed contracts; returns the per-transaction results."""
+    b = codegen.load_build(out_dir)
+    contracts, offset = _setup(client, session, out_dir, b)
+    gas_cap = int(client.call("eth_getBlockByNumber", "latest", False)["gasLimit"], 16)
+    qmap, results, skipped = {}, [], Counter()
+    last, drift = _latest_timestamp(client), 0
+    start = time.perf_counter()
+    client.call("evm_setAutomine", False)
+    try:
+        for _, timestamp, txs in session["blocks"]:
+            sent = []
+            for tx in txs:
+                gas = min(gas_cap, tx["gas"] // max(1, len(tx["calls"])) * GAS_FACTOR + GAS_EXTRA)
+                requests = []
+                for call in tx["calls"]:
+                    if call[0] == "create":
+                        qmap[call[2]] = len(qmap) + 1
+                    if call[2] is not None and call[2] not in qmap:
+                        skipped[call[0]] += 1
+                        continue
+                    requests.append(_request(b, contracts, call, qmap, offset, gas))
+                sent.append((tx, requests))
+            flat = [r for _, requests in sent for r in requests]
+            hashes = client.batch([("eth_sendTransaction", [r]) for r in flat])
+            target = timestamp + offset
+            drift = max(drift, last + 1 - target)
+            receipts, last = _mine(client, hashes, max(target, last + 1))
+            outcomes = iter(zip(flat, hashes, receipts))
+            for tx, requests in sent:
+                results.append((tx, [next(outcomes) for _ in requests]))
+    finally:
+        client.call("evm_setAutomine", True)
+    return {
+        "voting": contracts["MPVoting"],
+        "bindings": b,
+        "offset": offset,
+        "drift": drift,
+        "seconds": time.perf_counter() - start,
+        "qmap": qmap,
+        "skipped": skipped,
+        "results": results,
+    }
+
+
+def _outcomes(events, qmap=None):
+    out = {}
+    for name, q, *fields in events:
+        q = qmap.get(q) if qmap is not None else q
+        if name == "QuestionClosed":
+            out[q] = ("winner", fields[1], fields[0])
+        elif name == "QuestionClosedWithDraw":
+            out[q] = ("draw", list(fields[1]), fields[0])
+    return out
+
+
+def _payouts(events, qmap=None):
+    stakes, vault = {}, Counter()
+    for name, q, *fields in events:
+        q = qmap.get(q) if qmap is not None else q
+        if name == "StakeReturned":
+            stakes[(q, fields[0])] = fields[1]
+        elif name == "VaultEarnings":
+            vault[q] += fields[1]
+    return stakes, vault
+
+
+def _kind(tx):
+    fns = sorted({c[0] for c in tx["calls"]}) or ["none"]
+    return "+".join(fns) + (" (batched)" if len(tx["calls"]) > 1 else "")
+
+
+def compare(client, session, replayed):
+    """Gas per kind, outcomes and payouts of the recording against the replay."""
+    qmap = replayed["qmap"]
+    mp = replayed["bindings"].MPVoting
+    gas = defaultdict(lambda: [0, 0, 0])
+    failures = Counter()
+    original_events, replay_events = [], []
+    for tx, outcomes in replayed["results"]:
+        original_events += tx["events"]
+        ok = len(outcomes) == len(tx["calls"])
+        used = 0
+        for request, tx_hash, receipt in outcomes:
+            if isinstance(tx_hash, rpc.RPCError):
+                failures[f"{_kind(tx)}: {revert_reason(tx_hash)}"] += 1
+                ok = False
+                continue
+            used += int(receipt["gasUsed"], 16)
+            if int(receipt["status"], 16) != 1:
+                ok = False
+                call = {k: request[k] for k in ("from", "to", "data", "value") if k in request}
+                try:
+                    client.call("eth_call", call, receipt["blockNumber"])
+                    failures[f"{_kind(tx)}: reverted (no reason on replay)"] += 1
+                except rpc.RPCError as e:
+                    failures[f"{_kind(tx)}: {revert_reason(e)}"] += 1
+                continue
+            replay_events += [e for e in (decode_event(mp, log) for log in receipt["logs"]) if e is not None]
+        if ok:
+            entry = gas[_kind(tx)]
+            entry[0] += 1
+            entry[1] += tx["gas"]
+            entry[2] += used
+
+    original_outcomes = _outcomes(original_events, qmap)
+    replay_outcomes = _outcomes(replay_events)
+    original_stakes, original_vault = _payouts(original_events, qmap)
+    replay_stakes, replay_vault = _payouts(replay_events)
+    questions = sorted(set(original_outcomes) | set(replay_outcomes), key=lambda q: (q is None, q or 0))
+    return {
+        "calls": sum(len(outcomes) for _, outcomes in replayed["results"]),
+        "transactions": len(replayed["results"]),
+        "blocks": len(session["blocks"]),
+        "seconds": replayed["seconds"],
+        "offset": replayed["offset"],
+        "drift": replayed["drift"],
+        "skipped": dict(replayed["skipped"]),
+        "failures": dict(failures),
+        "gas": {kind: {"count": c, "original": o, "replay": r} for kind, (c, o, r) in sorted(gas.items())},
+        "outcome_mismatches": [
+            {"question": q, "original": original_outcomes.get(q), "replay": replay_outcomes.get(q)}
+            for q in questions if original_outcomes.get(q) != replay_outcomes.get(q)
+        ],
+        "questions": len(questions),
+        "stake_mismatches": [
+            {"question": q, "voter": v, "original": original_stakes.get((q, v)), "replay": replay_stakes.get((q, v))}
+            for q, v in sorted(set(original_stakes) | set(replay_stakes), key=lambda k: (k[0] or 0, k[1]))
+            if original_stakes.get((q, v)) != replay_stakes.get((q, v))
+        ],
+        "stakes": len(set(original_stakes) | set(replay_stakes)),
+        "vault_mismatches": [
+            {"question": q, "original": original_vault.get(q, 0), "replay": replay_vault.get(q, 0)}
+            for q in sorted(set(original_vault) | set(replay_vault), key=lambda q: q or 0)
+            if original_vault.get(q, 0) != replay_vault.get(q, 0)
+        ],
+    }
+
+
+def report(result):
+    lines = [
+        "=== REPLAY REPORT ===",
+        f"Replayed {result['calls']} calls from {result['transactions']} transactions in {result['blocks']} blocks "
+        f"in {result['seconds']:.2f}s ({result['calls'] / max(result['seconds'], 1e-9):.0f} calls/s)",
+        f"Timestamp offset: +{result['offset']}s, max drift: {max(0, result['drift'])}s",
+    ]
+    if result["skipped"]:
+        lines.append(f"Skipped (question created before the capture): {result['skipped']}")
+    if result["failures"]:
+        lines.append("Failed calls:")
+        lines += [f"  {n:>6}  {reason}" for reason, n in sorted(result["failures"].items(), key=lambda kv: -kv[1])]
+    lines += ["", f"{'Gas by kind':<28}{'txs':>7}{'original':>14}{'replay':>14}{'delta':>9}"]
+    for kind, g in result["gas"].items():
+        delta = (g["replay"] - g["original"]) / g["original"] * 100 if g["original"] else 0.0
+        lines.append(f"  {kind:<26}{g['count']:>7}{g['original'] // max(g['count'], 1):>14}"
+                     f"{g['replay'] // max(g['count'], 1):>14}{delta:>+8.1f}%")
+    lines += [
+        "",
+        f"Outcomes: {result['questions'] - len(result['outcome_mismatches'])}/{result['questions']} questions match",
+    ]
+    lines += [f"  question {m['question']}: original {m['original']}, replay {m['replay']}" for m in result["outcome_mismatches"]]
+    lines.append(f"Stake returns: {result['stakes'] - len(result['stake_mismatches'])}/{result['stakes']} match")
+    lines += [f"  question {m['question']} {m['voter']}: original {m['original']}, replay {m['replay']}"
+              for m in result["stake_mismatches"]]
+    lines.append(f"Vault earnings: {len(result['vault_mismatches'])} mismatching questions")
+    lines += [f"  question {m['question']}: original {m['original']}, replay {m['replay']}" for m in result["vault_mismatches"]]
+    print("\n".join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture an MPVoting session and replay it on fresh contracts")
+    parser.add_argument("--rpc-url", default=RPC_URL)
+    sub = parser.add_subparsers(dest="command", required=True)
+    cap = sub.add_parser("capture", help="record a session from chain events")
+    cap.add_argument("--voting", default=os.environ.get("VOTING_ADDRESS"), help="MPVoting address (default: $VOTING_ADDRESS)")
+    cap.add_argument("--from-block", type=int, default=0)
+    cap.add_argument("--to-block", type=int)
+    cap.add_argument("-o", "--output", default="session.replay.gz")
+    run = sub.add_parser("run", help="replay a recorded session against fresh contracts")
+    run.add_argument("session")
+    run.add_argument("--out", default=str(OUT_DIR), help="forge output directory with the build to test (default: %(default)s)")
+    run.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    client = rpc.Client(args.rpc_url)
+    if args.command == "capture":
+        if not args.voting:
+            parser.error("--voting or $VOTING_ADDRESS is required")
+        session = capture(client, args.voting, args.from_block, args.to_block)
+        save(session, args.output)
+        n = sum(len(txs) for _, _, txs in session["blocks"])
+        print(f"Captured {n} transactions in {len(session['blocks'])} blocks and {len(session['roster'])} MP tokens to {args.output}")
+    else:
+        session = load(args.session)
+        replayed = replay(client, session, args.out)
+        result = compare(client, session, replayed)
+        report(result)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(result, f, indent=2)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
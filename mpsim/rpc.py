@@ -0,0 +1,241 @@
+"""Minimal JSON-RPC client over a keep-alive HTTP connection.
+
+Plain ``http://`` nodes are spoken to over a bare socket: importing
+``http.client`` (which pulls in the ``email`` parser and ``ssl``) would cost
+more than the rest of a short command's startup. ``https://`` URLs go through
+``http.client``, imported on first use.
+"""
+import itertools
+import json
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .config import RPC_URL
+
+
+class RPCError(RuntimeError):
+    def __init__(self, error):
+        super().__init__(error.get("message", str(error)))
+        self.code = error.get("code")
+        self.data = error.get("data")
+
+
+class _StaleConnection(ConnectionError):
+    """A reused connection failed before any byte of the response arrived.
+
+    This is how a node closing an idle keep-alive connection shows up, and the
+    only failure after which :class:`Client` sends a request again.
+    """
+
+
+class _HTTPConnection:
+    """Keep-alive HTTP/1.1 POSTs over a plain socket."""
+
+    def __init__(self, host, port, timeout):
+        self.host, self.port, self.timeout = host, port or 80, timeout
+        self._sock = None
+        self._buf = b""
+
+    def post(self, path, body):
+        reused = self._sock is not None
+        if not reused:
+            self._sock = socket.create_connection((self.host, self.port), self.timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._buf = b""
+        try:
+            self._sock.sendall(
+                f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            head = self._until(b"\r\n\r\n")
+        except ConnectionError as e:
+            stale = reused and not self._buf
+            self.close()
+            if stale:
+                raise _StaleConnection(str(e)) from e
+            raise
+        status, *lines = head.decode("latin-1").split("\r\n")
+        headers = {k.strip().lower(): v.strip().lower() for k, _, v in (line.partition(":") for line in lines)}
+        if "content-length" in headers:
+            data = self._exactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            data = self._chunked()
+        else:
+            data = self._rest()
+        keep_alive = "keep-alive" if status.startswith("HTTP/1.1") else "close"
+        if headers.get("connection", keep_alive) == "close":
+            self.close()
+        return data
+
+    def _recv(self):
+        chunk = self._sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("connection closed by the node")
+        self._buf += chunk
+
+    def _until(self, marker):
+        while marker not in self._buf:
+            self._recv()
+        head, _, self._buf = self._buf.partition(marker)
+        return head
+
+    def _exactly(self, n):
+        while len(self._buf) < n:
+            self._recv()
+        data, self._buf = self._buf[:n], self._buf[n:]
+        return data
+
+    def _chunked(self):
+        parts = []
+        while True:
+            size = int(self._until(b"\r\n").split(b";")[0], 16)
+            if not size:
+                self._until(b"\r\n")
+                return b"".join(parts)
+            parts.append(self._exactly(size))
+            self._exactly(2)
+
+    def _rest(self):
+        try:
+            while True:
+                self._recv()
+        except ConnectionError:
+            data, self._buf = self._buf, b""
+            return data
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class _HTTPSConnection:
+    def __init__(self, host, port, timeout):
+        import http.client
+
+        self._conn = http.client.HTTPSConnection(host, port, timeout=timeout)
+
+    def post(self, path, body):
+        import http.client
+
+        reused = self._conn.sock is not None
+        try:
+            self._conn.request("POST", path, body, {"Content-Type": "application/json"})
+            return self._conn.getresponse().read()
+        except (http.client.RemoteDisconnected, BrokenPipeError) as e:
+            # RemoteDisconnected: closed before the status line; BrokenPipeError: closed before the send
+            if reused:
+                raise _StaleConnection(str(e)) from e
+            raise ConnectionError(str(e)) from e
+        except http.client.HTTPException as e:
+            raise ConnectionError(str(e)) from e
+
+    def close(self):
+        self._conn.close()
+
+
+class Client:
+    """One connection to the node. Not thread-safe; use :func:`local` from worker threads."""
+
+    def __init__(self, url=RPC_URL, timeout=30):
+        parts = urlsplit(url)
+        conn_cls = _HTTPSConnection if parts.scheme == "https" else _HTTPConnection
+        self._conn = conn_cls(parts.hostname, parts.port, timeout)
+        self._path = parts.path or "/"
+        self._ids = itertools.count(1)
+
+    def _post(self, payload):
+        body = json.dumps(payload).encode()
+        for attempt in (0, 1):
+            try:
+                return json.loads(self._conn.post(self._path, body))
+            except _StaleConnection:
+                # the node closed an idle keep-alive connection; reconnect once
+                self._conn.close()
+                if attempt:
+                    raise
+            except Exception:
+                # a timeout or a partial read leaves the rest of the reply in the socket, and the
+                # node may have acted on the request (an eth_sendTransaction, say): drop the
+                # connection and never resend
+                self._conn.close()
+                raise
+
+    def _out_of_sync(self, expected, got):
+        self._conn.close()
+        return ConnectionError(f"reply ids {got} do not match request ids {expected}")
+
+    def call(self, method, *params):
+        request_id = next(self._ids)
+        reply = self._post({"jsonrpc": "2.0", "id": request_id, "method": method, "params": list(params)})
+        # errors the node could not tie to a request (a parse error, say) come back with a null id
+        if reply.get("id") != request_id and not (reply.get("id") is None and "error" in reply):
+            raise self._out_of_sync([request_id], [reply.get("id")])
+        if "error" in reply:
+            raise RPCError(reply["error"])
+        return reply["result"]
+
+    def batch(self, calls):
+        """Send ``[(method, params), ...]`` as one request.
+
+        Results come back in order; failed calls are returned as :class:`RPCError`
+        instances rather than raised, so one bad call does not hide the others.
+        """
+        if not calls:
+            return []
+        first = next(self._ids)
+        payload = [
+            {"jsonrpc": "2.0", "id": first + i, "method": method, "params": list(params)}
+            for i, (method, params) in enumerate(calls)
+        ]
+        self._ids = itertools.count(first + len(calls))
+        replies = {r.get("id"): r for r in self._post(payload)}
+        expected = [first + i for i in range(len(calls))]
+        if set(replies) != set(expected):
+            raise self._out_of_sync(expected, list(replies))
+        return [
+            RPCError(r["error"]) if "error" in r else r["result"]
+            for r in (replies[first + i] for i in range(len(calls)))
+        ]
+
+    def close(self):
+        self._conn.close()
+
+
+_local = threading.local()
+
+
+def local(url=RPC_URL):
+    """A :class:`Client` private to the calling thread."""
+    clients = _local.__dict__.setdefault("clients", {})
+    if url not in clients:
+        clients[url] = Client(url)
+    return clients[url]
+
+
+def wait_for_receipt(client, tx_hash, timeout=120, poll=0.05):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        receipt = client.call("eth_getTransactionReceipt", tx_hash)
+        if receipt is not None:
+            return receipt
+        time.sleep(poll)
+    raise TimeoutError(f"no receipt for {tx_hash} after {timeout}s")
+
+
+def send_all(client, txs):
+    """Send transactions in one batch under automine and wait for the last one."""
+    hashes = client.batch([("eth_sendTransaction", [tx]) for tx in txs])
+    for h in hashes:
+        if isinstance(h, RPCError):
+            raise h
+    if hashes:
+        wait_for_receipt(client, hashes[-1])
+    return hashes
+
+
+def warp(client, timestamp):
+    client.call("evm_setNextBlockTimestamp", timestamp)
+    client.call("evm_mine")
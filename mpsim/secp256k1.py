@@ -0,0 +1,177 @@
+"""Pure-Python secp256k1: address derivation, deterministic signing and recovery.
+
+Enough for signing EIP-712 votes and deriving MP accounts without
+eth_account. Signatures use RFC 6979 nonces and are normalised to low ``s``,
+which OpenZeppelin's ``ECDSA.recover`` requires.
+"""
+import hashlib
+import hmac
+
+from .keccak import keccak256
+
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+G = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8,
+)
+
+
+def _add(a, b):
+    # Jacobian coordinates; None is the point at infinity
+    if a is None:
+        return b
+    if b is None:
+        return a
+    x1, y1, z1 = a
+    x2, y2, z2 = b
+    z1z1, z2z2 = z1 * z1 % P, z2 * z2 % P
+    u1, u2 = x1 * z2z2 % P, x2 * z1z1 % P
+    s1, s2 = y1 * z2 * z2z2 % P, y2 * z1 * z1z1 % P
+    if u1 == u2:
+        return _double(a) if s1 == s2 else None
+    h, r = (u2 - u1) % P, (s2 - s1) % P
+    hh = h * h % P
+    hhh = h * hh % P
+    v = u1 * hh % P
+    x3 = (r * r - hhh - 2 * v) % P
+    y3 = (r * (v - x3) - s1 * hhh) % P
+    return x3, y3, h * z1 * z2 % P
+
+
+def _double(a):
+    if a is None or a[1] == 0:
+        return None
+    x, y, z = a
+    yy = y * y % P
+    s = 4 * x * yy % P
+    m = 3 * x * x % P
+    x3 = (m * m - 2 * s) % P
+    y3 = (m * (s - x3) - 8 * yy * yy) % P
+    return x3, y3, 2 * y * z % P
+
+
+def _mul(k, point):
+    result, addend = None, (point[0], point[1], 1)
+    while k:
+        if k & 1:
+            result = _add(result, addend)
+        addend = _double(addend)
+        k >>= 1
+    return result
+
+
+_G_TABLE = []
+
+
+def _mul_g(k):
+    """``k * G`` from a lazily built table of ``j * 256**w * G``: 32 additions and no doublings."""
+    if not _G_TABLE:
+        base = (G[0], G[1], 1)
+        for _ in range(32):
+            row, point = [], None
+            for _ in range(255):
+                point = _add(point, base)
+                row.append((*_affine(point), 1))
+            _G_TABLE.append(row)
+            base = (*_affine(_add(point, base)), 1)
+    result, w = None, 0
+    while k:
+        if k & 0xFF:
+            result = _add(result, _G_TABLE[w][(k & 0xFF) - 1])
+        k >>= 8
+        w += 1
+    return result
+
+
+def _affine(a):
+    if a is None:
+        raise ValueError("point at infinity")
+    x, y, z = a
+    zi = pow(z, -1, P)
+    zi2 = zi * zi % P
+    return x * zi2 % P, y * zi2 * zi % P
+
+
+def public_key(private_key):
+    """Uncompressed ``(x, y)`` public key of an int private key."""
+    if not 0 < private_key < N:
+        raise ValueError("private key out of range")
+    return _affine(_mul_g(private_key))
+
+
+def address_of(point):
+    x, y = point
+    return "0x" + keccak256(x.to_bytes(32, "big") + y.to_bytes(32, "big"))[-20:].hex()
+
+
+def to_address(private_key):
+    """Checksum-free ``0x`` address of a private key (int or hex string)."""
+    return address_of(public_key(_key(private_key)))
+
+
+def _key(private_key):
+    if isinstance(private_key, str):
+        return int(private_key, 16)
+    return private_key
+
+
+def _nonce(key, digest):
+    # RFC 6979 section 3.2 with HMAC-SHA256; qlen == hlen == 256 so no bit trimming
+    x = key.to_bytes(32, "big")
+    h = (int.from_bytes(digest, "big") % N).to_bytes(32, "big")
+    v, k = b"\x01" * 32, b"\x00" * 32
+    k = hmac.new(k, v + b"\x00" + x + h, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    k = hmac.new(k, v + b"\x01" + x + h, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    while True:
+        v = hmac.new(k, v, hashlib.sha256).digest()
+        candidate = int.from_bytes(v, "big")
+        if 0 < candidate < N:
+            return candidate
+        k = hmac.new(k, v + b"\x00", hashlib.sha256).digest()
+        v = hmac.new(k, v, hashlib.sha256).digest()
+
+
+def sign(private_key, digest):
+    """Sign a 32-byte digest; returns ``(v, r, s)`` with ``v`` in {27, 28} and low ``s``."""
+    key = _key(private_key)
+    z = int.from_bytes(digest, "big")
+    while True:
+        k = _nonce(key, digest)
+        rx, ry = _affine(_mul_g(k))
+        r = rx % N
+        s = pow(k, -1, N) * (z + r * key) % N
+        if r and s:
+            break
+    recovery = (ry & 1) | (2 if rx >= N else 0)
+    if s > N // 2:
+        s = N - s
+        recovery ^= 1
+    return 27 + recovery, r, s
+
+
+def signature_bytes(v, r, s):
+    """65-byte ``r || s || v`` as ``ECDSA.recover`` expects."""
+    return r.to_bytes(32, "big") + s.to_bytes(32, "big") + bytes([v])
+
+
+def recover(digest, v, r, s):
+    """Address that produced ``(v, r, s)`` over ``digest``."""
+    if not (0 < r < N and 0 < s < N):
+        raise ValueError("invalid signature")
+    recovery = v - 27 if v >= 27 else v
+    x = r + (N if recovery & 2 else 0)
+    if x >= P:
+        raise ValueError("invalid signature")
+    alpha = (pow(x, 3, P) + 7) % P
+    y = pow(alpha, (P + 1) // 4, P)
+    if y * y % P != alpha:
+        raise ValueError("invalid signature")
+    if (y & 1) != (recovery & 1):
+        y = P - y
+    z = int.from_bytes(digest, "big")
+    ri = pow(r, -1, N)
+    q = _add(_mul(s * ri % N, (x, y)), _mul_g((-z * ri) % N))
+    return address_of(_affine(q))
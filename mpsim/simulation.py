@@ -0,0 +1,255 @@
+"""End-to-end MP voting demo: deploy, mint, create questions, vote, close, claim.
+
+Every step goes through a :class:`~mpsim.journal.Journal`, so an interrupted
+run picks up where it stopped. Contract reads go through the generated
+bindings over JSON-RPC; ``cast`` only signs and publishes transactions.
+``voting_simulation.py`` and ``python -m mpsim simulate`` both call
+:func:`main`; nothing runs on import.
+"""
+import argparse
+import os
+
+from . import codegen, rpc
+from .config import ADMIN_ADDRESS, ADMIN_KEY, RPC_URL, VOTERS
+from .journal import Journal, require_deployed
+
+QUESTIONS = [
+    "Environmental protection bill?",
+    "Education reform proposal?",
+    "Renewable energy funding?",
+    "Summer break proposal?"
+]
+
+VOTING_PATTERNS = [
+    # Question 1: 3 YES, 2 NO, 1 ABSTAIN
+    [0, 0, 0, 1, 1, 2],
+    # Question 2: 2 YES, 3 NO, 1 ABSTAIN
+    [0, 0, 1, 1, 1, 2],
+    # Question 3: 1 YES, 1 NO, 4 ABSTAIN
+    [2, 2, 2, 2, 0, 1],
+    # Question 4: 2 YES, 2 NO, 2 ABSTAIN (DRAW)
+    [0, 0, 1, 1, 2, 2]
+]
+
+VOTE_NAMES = ["YES", "NO", "ABSTAIN"]
+
+
+def deploy(script, marker):
+    cmd = f'forge script {script} --rpc-url {RPC_URL} --private-key {ADMIN_KEY} --broadcast 2>/dev/null'
+    output = os.popen(cmd).read()
+    for line in output.split('\n'):
+        if marker in line:
+            return line.split(":")[-1].strip()
+    print(f"ERROR: Failed to deploy ({marker})")
+    print("Full output:", output)
+    exit(1)
+
+
+def view(client, mp, voting, fn, *args):
+    """Call the MPVoting view ``fn`` and decode the result with the ``mp`` bindings."""
+    return getattr(mp, f"decode_{fn}")(client.call("eth_call", {"to": voting, "data": getattr(mp, fn)(*args)}, "latest"))
+
+
+def balance(client, address):
+    return int(client.call("eth_getBalance", address, "latest"), 16)
+
+
+def block_timestamp(client):
+    return int(client.call("eth_getBlockByNumber", "latest", False)["timestamp"], 16)
+
+
+def warp_to(client, timestamp):
+    """Mine a block at ``timestamp`` unless the chain is already past it (anvil only)."""
+    if block_timestamp(client) < timestamp:
+        rpc.warp(client, timestamp)
+
+
+def check_balance(client, address, label):
+    balance_wei = balance(client, address)
+    print(f"{label}: {balance_wei / 1e18:.4f} ETH")
+    return balance_wei
+
+
+def has_voted(client, mp, voting, q, address):
+    return view(client, mp, voting, "checkVote", q, address).hasVoted
+
+
+def stake_returned(client, mp, voting, q, address):
+    return view(client, mp, voting, "getStakeInfo", q, address).returned
+
+
+def is_closed(client, mp, voting, q):
+    return not view(client, mp, voting, "getQuestionDetails", q).isActive
+
+
+def question_count(client, mp, voting):
+    return view(client, mp, voting, "questionCount")
+
+
+def event_amounts(mp, record, event):
+    """Sum the ``amount`` of every ``event`` log in a journaled receipt."""
+    decoded = (mp.decode_log(log) for log in record.get("logs", []))
+    return sum(e.amount for e in decoded if isinstance(e, event))
+
+
+def tx_ok(record):
+    return record["state"] == "done"
+
+
+def initial_balances(client):
+    balances = {address: check_balance(client, address, label) for _, address, label in VOTERS}
+    balances[ADMIN_ADDRESS] = check_balance(client, ADMIN_ADDRESS, "Admin")
+    return balances
+
+
+def claim(journal, client, mp, voting, q, private_key, address, label, vote_name):
+    record = journal.send(
+        f"claim-q{q}-{label}", private_key, address, voting,
+        "claimStake(uint256)", q,
+        check=lambda: stake_returned(client, mp, voting, q, address),
+    )
+    if record.get("reconciled"):
+        print(f"{label} ({vote_name}) already claimed")
+    elif not tx_ok(record):
+        print(f"{label} ({vote_name}) claim failed: {record.get('error', record)}")
+    else:
+        amount = event_amounts(mp, record, mp.StakeReturned)
+        print(f"{label} ({vote_name}) received: {amount / 1e18:.1f} ETH")
+    return record
+
+
+def run(journal, client):
+    print("=== MP VOTING SYSTEM WITH 100 ETH STAKING + DRAW DEMONSTRATION ===")
+
+    os.environ["PRIVATE_KEY"] = ADMIN_KEY
+
+    print("=== DEPLOYING CONTRACTS ===")
+    print("Deploying MPTokenFactory...")
+    factory = journal.once("deploy-factory", lambda: deploy("script/Deploy.sol:DeployMPTokenFactory", "MPTokenFactory deployed at:"))
+    require_deployed(journal, factory)
+
+    os.environ["FACTORY_ADDRESS"] = factory
+    print(f"Factory Address: {factory}")
+
+    print("=== Creating MP NFTs ===")
+    mp_output = journal.once("create-mp-nfts", lambda: os.popen(f"./create_mp_nfts.sh --factory {factory} 2>/dev/null").read())
+    print("MP NFT Creation output:")
+    print(mp_output)
+    print("Deploying MPVoting...")
+    voting = journal.once("deploy-voting", lambda: deploy("script/DeployMPVoting.sol:DeployMPVoting", "MPVoting deployed at:"))
+    require_deployed(journal, voting)
+
+    print(f"Voting Address: {voting}")
+    # forge script has built out/ by now, so the bindings used for reads are up to date
+    mp = codegen.load().MPVoting
+
+    print("\n=== CREATING VOTING QUESTIONS ===")
+
+    schedule = journal.once("schedule", lambda: {"start": block_timestamp(client) + 60, "end": block_timestamp(client) + 500})
+    start_time, end_time = schedule["start"], schedule["end"]
+
+    for i, question in enumerate(QUESTIONS, 1):
+        print(f"Creating question {i}: {question}", end=" ")
+        record = journal.send(
+            f"create-question-{i}", ADMIN_KEY, ADMIN_ADDRESS, voting,
+            "createQuestion(string,uint256,uint256)", question, start_time, end_time,
+            check=lambda i=i: question_count(client, mp, voting) >= i,
+        )
+        if tx_ok(record):
+            print(f"( Question {i} created successfully )")
+        else:
+            print(f"( Question {i} creation failed: )")
+            print(record.get("error", record))
+    print("\n=== INITIAL BALANCES ===")
+
+    initial = journal.once("initial-balances", lambda: initial_balances(client))
+    admin_initial = initial[ADMIN_ADDRESS]
+
+    print(f"\nWaiting for voting to start...")
+    warp_to(client, start_time)
+
+    for q in range(4):
+        print(f"\n=== VOTING QUESTION {q+1} ===")
+        for i, (private_key, address, label) in enumerate(VOTERS):
+            vote_option = VOTING_PATTERNS[q][i]
+            print(f"{label} voting {VOTE_NAMES[vote_option]}...")
+
+            record = journal.send(
+                f"vote-q{q+1}-{label}", private_key, address, voting,
+                "vote(uint256,uint256)", q + 1, vote_option, value="100ether",
+                check=lambda q=q, address=address: has_voted(client, mp, voting, q + 1, address),
+            )
+            if not tx_ok(record):
+                print(f"Vote failed for {label}: {record.get('error', record)}")
+
+    print("\n=== VOTE COUNTS ===")
+    for q in range(1, 5):
+        print(f"Question {q}:")
+        yes_count = view(client, mp, voting, "getYesVotesCount", q)
+        no_count = view(client, mp, voting, "getNoVotesCount", q)
+        print(f"  Yes: {yes_count}")
+        print(f"  No: {no_count}")
+
+    print("\nFast forwarding time...")
+    warp_to(client, end_time + 1)
+
+    print("\n=== CLOSING VOTING ===")
+    # closeQuestions skips questions that are already closed, so a rerun resends the same ids
+    print("Closing questions 1-4 in one transaction...")
+    record = journal.send(
+        "close-all", ADMIN_KEY, ADMIN_ADDRESS, voting,
+        "closeQuestions(uint256[])", "[1,2,3,4]",
+        check=lambda: all(is_closed(client, mp, voting, q) for q in range(1, 5)),
+    )
+    if not tx_ok(record):
+        print(f"Failed to close questions: {record.get('error', record)}")
+
+    print("\n=== VOTING RESULTS ===")
+    for q in range(1, 5):
+        yes_won = view(client, mp, voting, "getVotingResults", q)
+        print(f"Question {q} YES won: {yes_won}")
+
+    print("\n=== DRAW DETECTION ===")
+    is_draw = view(client, mp, voting, "isQuestionDraw", 4)
+    print(f"Question 4 is draw: {is_draw}")
+
+    if is_draw:
+        tied_result = view(client, mp, voting, "getTiedOptions", 4)
+        print(f"Tied options: {tied_result}")
+
+    print("\n=== STAKE CLAIMING QUESTION 1 ===")
+    for i, (private_key, address, label) in enumerate(VOTERS):
+        claim(journal, client, mp, voting, 1, private_key, address, label, VOTE_NAMES[VOTING_PATTERNS[0][i]])
+
+    print("\n=== STAKE CLAIMING QUESTION 4 DRAW ===")
+    vault_earnings_from_draw = 0
+    for i, (private_key, address, label) in enumerate(VOTERS):
+        record = claim(journal, client, mp, voting, 4, private_key, address, label, VOTE_NAMES[VOTING_PATTERNS[3][i]])
+        vault_earnings_from_draw += event_amounts(mp, record, mp.VaultEarnings)
+
+    print(f"\nVault earnings from draw: {vault_earnings_from_draw / 1e18:.4f} ETH")
+
+    print("\n=== FINAL BALANCES ===")
+    admin_final = balance(client, ADMIN_ADDRESS) / 1e18
+    total_vault_earnings = admin_final - (admin_initial / 1e18)
+    print(f"Admin final balance: {admin_final:.4f} ETH")
+    print(f"Total vault earnings: {total_vault_earnings:.1f} ETH")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MP voting simulation, resumable from its journal")
+    parser.add_argument("--journal", default=".mp_journal.jsonl", help="journal file (default: %(default)s)")
+    parser.add_argument("--fresh", action="store_true", help="discard the journal and start over")
+    args = parser.parse_args()
+
+    journal = Journal(args.journal, fresh=args.fresh)
+    client = rpc.Client(RPC_URL)
+    try:
+        run(journal, client)
+    finally:
+        client.close()
+        journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Print the vote counts of MPVoting questions.
+
+A short command, so it stays off the bindings and the cast/forge tooling: the
+calldata comes from :mod:`mpsim.abi`, every question is read in one JSON-RPC
+batch and the results are decoded with :mod:`mpsim.fastdecode`::
+
+    python -m mpsim tallies --voting $VOTING_ADDRESS
+    python -m mpsim tallies --voting $VOTING_ADDRESS 1 4
+"""
+import argparse
+import os
+
+from . import abi, fastdecode, rpc
+from .config import RPC_URL
+
+
+def tallies(client, voting, questions=None):
+    """``[(questionId, question, isActive, [(option, votes), ...])]``; all questions by default."""
+    if questions is None:
+        count = abi.decode(["uint256"], client.call("eth_call", {"to": voting, "data": abi.encode_call("questionCount()")}, "latest"))[0]
+        questions = range(1, count + 1)
+    calls = []
+    for q in questions:
+        calls.append(("eth_call", [{"to": voting, "data": abi.encode_call("getQuestionDetails(uint256)", q)}, "latest"]))
+        calls.append(("eth_call", [{"to": voting, "data": abi.encode_call("getAllVoteCounts(uint256)", q)}, "latest"]))
+    results = client.batch(calls)
+    out = []
+    for q, details, counts in zip(questions, results[::2], results[1::2]):
+        for r in (details, counts):
+            if isinstance(r, rpc.RPCError):
+                raise r
+        d = fastdecode.question_details(details)
+        out.append((q, d.question, d.isActive, list(zip(d.options, fastdecode.vote_counts(counts)))))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the vote counts of MPVoting questions")
+    parser.add_argument("--rpc-url", default=RPC_URL)
+    parser.add_argument("--voting", default=os.environ.get("VOTING_ADDRESS"), help="MPVoting address (default: $VOTING_ADDRESS)")
+    parser.add_argument("questions", type=int, nargs="*", help="question ids (default: all)")
+    args = parser.parse_args()
+    if not args.voting:
+        parser.error("--voting or $VOTING_ADDRESS is required")
+
+    client = rpc.Client(args.rpc_url)
+    for q, question, active, counts in tallies(client, args.voting, args.questions or None):
+        print(f"Question {q} ({'open' if active else 'closed'}): {question}")
+        print("  " + "   ".join(f"{option}: {votes}" for option, votes in counts))
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
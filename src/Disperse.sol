@@ -0,0 +1,17 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+contract Disperse {
+    event Dispersed(address indexed sender, uint256 recipients, uint256 amount);
+    
+    function disperseEther(address payable[] calldata recipients, uint256 amount) external payable {
+        require(msg.value == amount * recipients.length, "Incorrect ETH amount");
+        
+        for (uint256 i = 0; i < recipients.length; i++) {
+            (bool success, ) = recipients[i].call{value: amount}("");
+            require(success, "Transfer failed");
+        }
+        
+        emit Dispersed(msg.sender, recipients.length, amount);
+    }
+}
@@ -3,11 +3,14 @@ pragma solidity ^0.8.19;
 
 import "@openzeppelin/contracts/access/AccessControl.sol";
 import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
+import "@openzeppelin/contracts/utils/cryptography/EIP712.sol";
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
 import "./MPToken.sol";
 import "./MPTokenFactory.sol";
 
-contract MPVoting is AccessControl, ReentrancyGuard {
+contract MPVoting is AccessControl, ReentrancyGuard, EIP712 {
     bytes32 public constant ADMIN_ROLE = keccak256("ADMIN_ROLE");
+    bytes32 public constant VOTE_TYPEHASH = keccak256("Vote(uint256 questionId,uint256 optionIndex,address voter)");
     MPTokenFactory public mpTokenFactory;
     MPToken public mpToken;
     
@@ -27,6 +30,9 @@ contract MPVoting is AccessControl, ReentrancyGuard {
         uint256 winningOption;
         uint256 totalStaked;
         uint256[] tiedOptions;
+        uint256 leadingOption;
+        uint256 leadingVotes;
+        uint256 leaderTieCount;
         mapping(uint256 => uint256) optionVotes; 
         mapping(address => bool) hasVoted;      
         mapping(address => uint256) voterChoice; 
@@ -34,8 +40,16 @@ contract MPVoting is AccessControl, ReentrancyGuard {
         mapping(address => bool) stakeReturned;
     }
     
+    struct SignedVote {
+        uint256 questionId;
+        uint256 optionIndex;
+        address voter;
+        bytes signature;
+    }
+    
     uint256 public questionCount;
     mapping(uint256 => Question) public questions;
+    mapping(address => uint256) public deposits;
     
     event QuestionCreated(uint256 indexed questionId, string question, uint256 startTime, uint256 endTime, address vault);
     event QuestionUpdated(uint256 indexed questionId, string question, bool isActive);
@@ -45,8 +59,10 @@ contract MPVoting is AccessControl, ReentrancyGuard {
     event StakeReturned(uint256 indexed questionId, address indexed voter, uint256 amount);
     event VaultEarnings(uint256 indexed questionId, address indexed vault, uint256 amount);
     event QuestionSettled(uint256 indexed questionId, uint256 totalDistributed);
+    event Deposited(address indexed voter, uint256 amount);
+    event DepositWithdrawn(address indexed voter, uint256 amount);
     
-    constructor(address _mpTokenFactoryAddress) {
+    constructor(address _mpTokenFactoryAddress) EIP712("MPVoting", "1") {
         require(_mpTokenFactoryAddress != address(0), "Invalid MP Token Factory address");
         mpTokenFactory = MPTokenFactory(_mpTokenFactoryAddress);
         address mpTokenAddress = mpTokenFactory.getMPTokenAddress();
@@ -116,73 +132,127 @@ contract MPVoting is AccessControl, ReentrancyGuard {
     }
     
     function vote(uint256 _questionId, uint256 _optionIndex) public payable nonReentrant {
+        _validateVote(_questionId, _optionIndex, msg.sender);
+        require(msg.value == STAKE_AMOUNT, "Must stake exactly 100 ETH");
+        _recordVote(_questionId, _optionIndex, msg.sender, msg.value);
+    }
+    
+    function deposit() public payable {
+        require(msg.value > 0, "Nothing to deposit");
+        deposits[msg.sender] += msg.value;
+        emit Deposited(msg.sender, msg.value);
+    }
+    
+    function withdrawDeposit(uint256 _amount) public nonReentrant {
+        require(deposits[msg.sender] >= _amount, "Insufficient deposit");
+        deposits[msg.sender] -= _amount;
+        
+        (bool success, ) = msg.sender.call{value: _amount}("");
+        require(success, "Withdrawal failed");
+        
+        emit DepositWithdrawn(msg.sender, _amount);
+    }
+    
+    function voteBatchWithSig(SignedVote[] calldata _votes) public nonReentrant {
+        for (uint256 i = 0; i < _votes.length; i++) {
+            SignedVote calldata v = _votes[i];
+            bytes32 digest = _hashTypedDataV4(keccak256(abi.encode(VOTE_TYPEHASH, v.questionId, v.optionIndex, v.voter)));
+            require(ECDSA.recover(digest, v.signature) == v.voter, "Invalid signature");
+            _validateVote(v.questionId, v.optionIndex, v.voter);
+            require(deposits[v.voter] >= STAKE_AMOUNT, "Insufficient deposit");
+            
+            deposits[v.voter] -= STAKE_AMOUNT;
+            _recordVote(v.questionId, v.optionIndex, v.voter, STAKE_AMOUNT);
+        }
+    }
+    
+    function domainSeparator() public view returns (bytes32) {
+        return _domainSeparatorV4();
+    }
+    
+    function _validateVote(uint256 _questionId, uint256 _optionIndex, address _voter) internal view {
         require(_questionId <= questionCount && _questionId > 0, "Invalid question ID");
         Question storage q = questions[_questionId];
         require(q.isActive, "Question is not active");
         require(block.timestamp >= q.startTime, "Voting has not started yet");
         require(block.timestamp <= q.endTime, "Voting has ended");
         require(_optionIndex < q.options.length, "Invalid option index");
-        require(!q.hasVoted[msg.sender], "Already voted");
-        require(isValidMPVoter(msg.sender), "Not a valid MP voter");
-        require(msg.value == STAKE_AMOUNT, "Must stake exactly 100 ETH");
-        
-        q.optionVotes[_optionIndex]++;
+        require(!q.hasVoted[_voter], "Already voted");
+        require(isValidMPVoter(_voter), "Not a valid MP voter");
+    }
+    
+    function _recordVote(uint256 _questionId, uint256 _optionIndex, address _voter, uint256 _stake) internal {
+        Question storage q = questions[_questionId];
+        uint256 votes = ++q.optionVotes[_optionIndex];
+        if (votes > q.leadingVotes) {
+            q.leadingVotes = votes;
+            q.leadingOption = _optionIndex;
+            q.leaderTieCount = 1;
+        } else if (votes == q.leadingVotes) {
+            q.leaderTieCount++;
+        }
         q.totalVotes++;
-        q.hasVoted[msg.sender] = true;
-        q.voterChoice[msg.sender] = _optionIndex;
-        q.voterStake[msg.sender] = msg.value;
-        q.totalStaked += msg.value;
+        q.hasVoted[_voter] = true;
+        q.voterChoice[_voter] = _optionIndex;
+        q.voterStake[_voter] = _stake;
+        q.totalStaked += _stake;
         
-        emit VoteCast(_questionId, msg.sender, _optionIndex, msg.value);
+        emit VoteCast(_questionId, _voter, _optionIndex, _stake);
     }
     
     function closeQuestion(uint256 _questionId) public {
+        _closeQuestion(_questionId);
+    }
+    
+    function closeQuestions(uint256[] calldata _questionIds) public {
+        for (uint256 i = 0; i < _questionIds.length; i++) {
+            uint256 questionId = _questionIds[i];
+            require(questionId <= questionCount && questionId > 0, "Invalid question ID");
+            if (!questions[questionId].isActive) {
+                continue;
+            }
+            _closeQuestion(questionId);
+        }
+    }
+    
+    function _closeQuestion(uint256 _questionId) internal {
         require(_questionId <= questionCount && _questionId > 0, "Invalid question ID");
         Question storage q = questions[_questionId];
         require(q.isActive, "Question already inactive");
         require(block.timestamp > q.endTime, "Voting period not over yet");
         require(!q.isSettled, "Question already settled");
         
-        uint256 maxVotes = 0;
-        for (uint256 i = 0; i < q.options.length; i++) {
-            if (q.optionVotes[i] > maxVotes) {
-                maxVotes = q.optionVotes[i];
-            }
-        }
+        (bool isDraw, uint256 winningOption) = _outcome(q);
+        q.isDraw = isDraw;
+        q.winningOption = winningOption;
         
-        uint256 tiedCount = 0;
-        for (uint256 i = 0; i < q.options.length; i++) {
-            if (q.optionVotes[i] == maxVotes) {
-                tiedCount++;
-            }
-        }
-        
-        if (tiedCount > 1) {
-            q.isDraw = true;
-            q.winningOption = type(uint256).max;
-            
+        if (isDraw) {
             for (uint256 i = 0; i < q.options.length; i++) {
-                if (q.optionVotes[i] == maxVotes) {
+                if (q.optionVotes[i] == q.leadingVotes) {
                     q.tiedOptions.push(i);
                 }
             }
             
             emit QuestionClosedWithDraw(_questionId, q.totalVotes, q.tiedOptions);
         } else {
-            q.isDraw = false;
-            for (uint256 i = 0; i < q.options.length; i++) {
-                if (q.optionVotes[i] == maxVotes) {
-                    q.winningOption = i;
-                    break;
-                }
-            }
-            
-            emit QuestionClosed(_questionId, q.totalVotes, q.winningOption);
+            emit QuestionClosed(_questionId, q.totalVotes, winningOption);
         }
         
         q.isActive = false;
     }
     
+    function _outcome(Question storage q) internal view returns (bool isDraw, uint256 winningOption) {
+        if (!q.isActive) {
+            return (q.isDraw, q.winningOption);
+        }
+        
+        uint256 tiedCount = q.totalVotes == 0 ? q.options.length : q.leaderTieCount;
+        if (tiedCount > 1) {
+            return (true, type(uint256).max);
+        }
+        return (false, q.leadingOption);
+    }
+    
     function settleStakes(uint256 _questionId) public onlyAdmin nonReentrant {
         require(_questionId <= questionCount && _questionId > 0, "Invalid question ID");
         Question storage q = questions[_questionId];
@@ -301,13 +371,14 @@ contract MPVoting is AccessControl, ReentrancyGuard {
     function getVotingResults(uint256 _questionId) public view returns (bool results) {
         require(_questionId <= questionCount && _questionId > 0, "Invalid question ID");
         Question storage q = questions[_questionId];
-        require(!q.isActive, "Voting not ended yet. Results will be available after the voting");
+        require(!q.isActive || block.timestamp > q.endTime, "Voting not ended yet. Results will be available after the voting");
         
-        if (q.isDraw) {
+        (bool isDraw, uint256 winningOption) = _outcome(q);
+        if (isDraw) {
             return false;
         }
         
-        return q.winningOption == 0;
+        return winningOption == 0;
     }
 
     function getDetailedVotingResults(uint256 _questionId) public view returns (
@@ -318,17 +389,16 @@ contract MPVoting is AccessControl, ReentrancyGuard {
     ) {
         require(_questionId <= questionCount && _questionId > 0, "Invalid question ID");
         Question storage q = questions[_questionId];
-        require(!q.isActive, "Voting not ended yet. Results will be available after the voting");
+        require(!q.isActive || block.timestamp > q.endTime, "Voting not ended yet. Results will be available after the voting");
         
-        isDraw = q.isDraw;
-        winningOption = q.winningOption;
+        (isDraw, winningOption) = _outcome(q);
         
         if (isDraw) {
             yesWon = false;
             noWon = false;
         } else {
-            yesWon = (q.winningOption == 0);
-            noWon = (q.winningOption == 1);
+            yesWon = (winningOption == 0);
+            noWon = (winningOption == 1);
         }
         
         return (isDraw, yesWon, noWon, winningOption);
@@ -0,0 +1,52 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+import "forge-std/Test.sol";
+import "../src/Disperse.sol";
+
+contract Rejector {}
+
+contract DisperseTest is Test {
+    Disperse public disperse;
+    address public funder = address(0x1);
+    
+    function setUp() public {
+        disperse = new Disperse();
+        vm.deal(funder, 10000 ether);
+    }
+    
+    function testDisperseEther() public {
+        address payable[] memory recipients = new address payable[](3);
+        recipients[0] = payable(address(0x100));
+        recipients[1] = payable(address(0x101));
+        recipients[2] = payable(address(0x102));
+        
+        vm.prank(funder);
+        disperse.disperseEther{value: 3000 ether}(recipients, 1000 ether);
+        
+        for (uint256 i = 0; i < recipients.length; i++) {
+            assertEq(recipients[i].balance, 1000 ether);
+        }
+        assertEq(funder.balance, 7000 ether);
+        assertEq(address(disperse).balance, 0);
+    }
+    
+    function testCannotDisperseWrongAmount() public {
+        address payable[] memory recipients = new address payable[](2);
+        recipients[0] = payable(address(0x100));
+        recipients[1] = payable(address(0x101));
+        
+        vm.prank(funder);
+        vm.expectRevert("Incorrect ETH amount");
+        disperse.disperseEther{value: 1000 ether}(recipients, 1000 ether);
+    }
+    
+    function testCannotDisperseToRejectingRecipient() public {
+        address payable[] memory recipients = new address payable[](1);
+        recipients[0] = payable(address(new Rejector()));
+        
+        vm.prank(funder);
+        vm.expectRevert("Transfer failed");
+        disperse.disperseEther{value: 1 ether}(recipients, 1 ether);
+    }
+}
@@ -803,5 +803,304 @@ contract MPVotingTest is Test {
         assertFalse(votingContract.getVotingResults(questionId));
     }
     
+    function _createSigningMP(string memory name) internal returns (address signer, uint256 key) {
+        (signer, key) = makeAddrAndKey(name);
+        vm.prank(admin);
+        factory.createMPToken(signer, name, "Independent", "Norwich South", 2024, block.timestamp + FOUR_YEARS);
+        vm.deal(signer, 1000 ether);
+    }
+    
+    function _signVote(uint256 key, uint256 questionId, uint256 optionIndex, address voter) internal view returns (bytes memory) {
+        bytes32 structHash = keccak256(abi.encode(votingContract.VOTE_TYPEHASH(), questionId, optionIndex, voter));
+        bytes32 digest = keccak256(abi.encodePacked("\x19\x01", votingContract.domainSeparator(), structHash));
+        (uint8 v, bytes32 r, bytes32 s) = vm.sign(key, digest);
+        return abi.encodePacked(r, s, v);
+    }
+    
+    function testDepositAndWithdraw() public {
+        vm.startPrank(mp1);
+        votingContract.deposit{value: 300 ether}();
+        assertEq(votingContract.deposits(mp1), 300 ether);
+        
+        uint256 balanceBefore = mp1.balance;
+        votingContract.withdrawDeposit(100 ether);
+        assertEq(votingContract.deposits(mp1), 200 ether);
+        assertEq(mp1.balance, balanceBefore + 100 ether);
+        
+        vm.expectRevert("Insufficient deposit");
+        votingContract.withdrawDeposit(201 ether);
+        
+        vm.expectRevert("Nothing to deposit");
+        votingContract.deposit{value: 0}();
+        vm.stopPrank();
+    }
+    
+    function testSignatureVectorMatchesPythonRelayer() public {
+        address at = 0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512;
+        address voter = 0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC;
+        vm.chainId(31337);
+        deployCodeTo("MPVoting.sol:MPVoting", abi.encode(address(factory)), at);
+        MPVoting pinned = MPVoting(at);
+
+        assertEq(pinned.domainSeparator(), 0x0c104b6334334222a15385eabd1dd7e0282d5c290964a7bae24e7b28de6f010b);
+        bytes32 digest = keccak256(abi.encodePacked("\x19\x01", pinned.domainSeparator(), keccak256(abi.encode(pinned.VOTE_TYPEHASH(), 1, 2, voter))));
+        assertEq(digest, 0xb29ad14a8bbd3e720fa85372ee32c2139c4502bd0801f3376333d8c9560563d6);
+
+        bytes32 r = 0x37546ad1aa0027a0a89367aaee231bf61348177c043d1f1c41c5bd8b30247eee;
+        bytes32 s = 0x5c17ff2290baa30aca6e1981f365d9631effc62cc9be12743dccdc155e436d56;
+        assertEq(ecrecover(digest, 27, r, s), voter);
+    }
+
+    function testVoteBatchWithSig() public {
+        (address signer1, uint256 key1) = _createSigningMP("Andrew Clark");
+        (address signer2, uint256 key2) = _createSigningMP("Patricia Lewis");
+        
+        vm.prank(admin);
+        uint256 questionId = votingContract.createQuestion("Relayed question?", block.timestamp + 1, block.timestamp + 1 hours);
+        vm.warp(block.timestamp + 2);
+        
+        vm.prank(signer1);
+        votingContract.deposit{value: STAKE_AMOUNT}();
+        vm.prank(signer2);
+        votingContract.deposit{value: 2 * STAKE_AMOUNT}();
+        
+        MPVoting.SignedVote[] memory votes = new MPVoting.SignedVote[](2);
+        votes[0] = MPVoting.SignedVote(questionId, 0, signer1, _signVote(key1, questionId, 0, signer1));
+        votes[1] = MPVoting.SignedVote(questionId, 1, signer2, _signVote(key2, questionId, 1, signer2));
+        
+        vm.expectEmit(true, true, false, true);
+        emit VoteCast(questionId, signer1, 0, STAKE_AMOUNT);
+        vm.prank(nonMP);
+        votingContract.voteBatchWithSig(votes);
+        
+        assertEq(votingContract.getYesVotesCount(questionId), 1);
+        assertEq(votingContract.getNoVotesCount(questionId), 1);
+        assertEq(votingContract.deposits(signer1), 0);
+        assertEq(votingContract.deposits(signer2), STAKE_AMOUNT);
+        (bool hasVoted, uint256 optionIndex) = votingContract.checkVote(questionId, signer2);
+        assertTrue(hasVoted);
+        assertEq(optionIndex, 1);
+        (,,,,, uint256 totalVotes,, uint256 totalStaked,) = votingContract.getQuestionDetails(questionId);
+        assertEq(totalVotes, 2);
+        assertEq(totalStaked, 2 * STAKE_AMOUNT);
+        
+        vm.warp(block.timestamp + 1 hours);
+        votingContract.closeQuestion(questionId);
+        
+        uint256 balanceBefore = signer2.balance;
+        vm.prank(signer2);
+        votingContract.claimStake(questionId);
+        assertEq(signer2.balance, balanceBefore + STAKE_AMOUNT);
+    }
+    
+    function testVoteBatchWithSigValidation() public {
+        (address signer1, uint256 key1) = _createSigningMP("Andrew Clark");
+        (address signer2, uint256 key2) = _createSigningMP("Patricia Lewis");
+        
+        vm.prank(admin);
+        uint256 questionId = votingContract.createQuestion("Relayed question?", block.timestamp + 1, block.timestamp + 1 hours);
+        vm.warp(block.timestamp + 2);
+        
+        vm.prank(signer1);
+        votingContract.deposit{value: 2 * STAKE_AMOUNT}();
+        
+        MPVoting.SignedVote[] memory votes = new MPVoting.SignedVote[](1);
+        
+        votes[0] = MPVoting.SignedVote(questionId, 0, signer1, _signVote(key2, questionId, 0, signer1));
+        vm.expectRevert("Invalid signature");
+        votingContract.voteBatchWithSig(votes);
+        
+        votes[0] = MPVoting.SignedVote(questionId, 1, signer1, _signVote(key1, questionId, 0, signer1));
+        vm.expectRevert("Invalid signature");
+        votingContract.voteBatchWithSig(votes);
+        
+        votes[0] = MPVoting.SignedVote(questionId, 0, signer2, _signVote(key2, questionId, 0, signer2));
+        vm.expectRevert("Insufficient deposit");
+        votingContract.voteBatchWithSig(votes);
+        
+        votes[0] = MPVoting.SignedVote(questionId, 0, signer1, _signVote(key1, questionId, 0, signer1));
+        votingContract.voteBatchWithSig(votes);
+        vm.expectRevert("Already voted");
+        votingContract.voteBatchWithSig(votes);
+        assertEq(votingContract.deposits(signer1), STAKE_AMOUNT);
+        
+        (address outsider, uint256 outsiderKey) = makeAddrAndKey("outsider");
+        votes[0] = MPVoting.SignedVote(questionId, 0, outsider, _signVote(outsiderKey, questionId, 0, outsider));
+        vm.expectRevert("Not a valid MP voter");
+        votingContract.voteBatchWithSig(votes);
+        
+        vm.warp(block.timestamp + 1 hours);
+        votes[0] = MPVoting.SignedVote(questionId, 0, signer2, _signVote(key2, questionId, 0, signer2));
+        vm.expectRevert("Voting has ended");
+        votingContract.voteBatchWithSig(votes);
+    }
+    
+    function testLeaderTrackingAcrossLeadChanges() public {
+        vm.prank(admin);
+        uint256 questionId = votingContract.createQuestion("Lead change?", block.timestamp + 1, block.timestamp + 1 hours);
+        vm.warp(block.timestamp + 2);
+        
+        vm.prank(mp1);
+        votingContract.vote{value: STAKE_AMOUNT}(questionId, 0);
+        vm.prank(mp2);
+        votingContract.vote{value: STAKE_AMOUNT}(questionId, 1);
+        vm.prank(mp3);
+        votingContract.vote{value: STAKE_AMOUNT}(questionId, 1);
+        vm.prank(mp4);
+        votingContract.vote{value: STAKE_AMOUNT}(questionId, 2);
+        
+        vm.warp(block.timestamp + 1 hours);
+        vm.expectEmit(true, false, false, true);
+        emit QuestionClosed(questionId, 4, 1);
+        votingContract.closeQuestion(questionId);
+        
+        (bool isDraw, bool yesWon, bool noWon, uint256 winningOption) = votingContract.getDetailedVotingResults(questionId);
+        assertFalse(isDraw);
+        assertFalse(yesWon);
+        assertTrue(noWon);
+        assertEq(winningOption, 1);
+    }
+    
+    function testLazyVotingResultsBeforeClose() public {
+        vm.prank(admin);
+        uint256 questionId = votingContract.createQuestion("Lazy results?", block.timestamp + 1, block.timestamp + 1 hours);
+        vm.warp(block.timestamp + 2);
+        
+        vm.prank(mp1);
+        votingContract.vote{value: STAKE_AMOUNT}(questionId, 0);
+        vm.prank(mp2);
+        votingContract.vote{value: STAKE_AMOUNT}(questionId, 0);
+        vm.prank(mp3);
+        votingContract.vote{value: STAKE_AMOUNT}(questionId, 1);
+        
+        vm.expectRevert("Voting not ended yet. Results will be available after the voting");
+        votingContract.getVotingResults(questionId);
+        
+        vm.warp(block.timestamp + 1 hours);
+        assertTrue(votingContract.getVotingResults(questionId));
+        (bool isDraw,,, uint256 winningOption) = votingContract.getDetailedVotingResults(questionId);
+        assertFalse(isDraw);
+        assertEq(winningOption, 0);
+        
+        (,,,, bool isActive,,,,) = votingContract.getQuestionDetails(questionId);
+        assertTrue(isActive);
+    }
+    
+    function testLazyDetailedResultsWhenNoOrAbstainLeads() public {
+        vm.startPrank(admin);
+        uint256 noId = votingContract.createQuestion("No leads?", block.timestamp + 1, block.timestamp + 1 hours);
+        uint256 abstainId = votingContract.createQuestion("Abstain leads?", block.timestamp + 1, block.timestamp + 1 hours);
+        vm.stopPrank();
+        vm.warp(block.timestamp + 2);
+        
+        vm.prank(mp1);
+        votingContract.vote{value: STAKE_AMOUNT}(noId, 1);
+        vm.prank(mp2);
+        votingContract.vote{value: STAKE_AMOUNT}(noId, 1);
+        vm.prank(mp3);
+        votingContract.vote{value: STAKE_AMOUNT}(noId, 1);
+        vm.prank(mp4);
+        votingContract.vote{value: STAKE_AMOUNT}(noId, 0);
+        vm.prank(mp1);
+        votingContract.vote{value: STAKE_AMOUNT}(abstainId, 2);
+        vm.prank(mp2);
+        votingContract.vote{value: STAKE_AMOUNT}(abstainId, 2);
+        vm.prank(mp3);
+        votingContract.vote{value: STAKE_AMOUNT}(abstainId, 0);
+        
+        vm.warp(block.timestamp + 1 hours);
+        (bool isDraw, bool yesWon, bool noWon, uint256 winningOption) = votingContract.getDetailedVotingResults(noId);
+        assertFalse(isDraw);
+        assertFalse(yesWon);
+        assertTrue(noWon);
+        assertEq(winningOption, 1);
+        assertFalse(votingContract.getVotingResults(noId));
+        
+        (isDraw, yesWon, noWon, winningOption) = votingContract.getDetailedVotingResults(abstainId);
+        assertFalse(isDraw);
+        assertFalse(yesWon);
+        assertFalse(noWon);
+        assertEq(winningOption, 2);
+        
+        (,,,, bool isActive,,,,) = votingContract.getQuestionDetails(noId);
+        assertTrue(isActive);
+    }
+    
+    function testCloseQuestionsBatch() public {
+        vm.startPrank(admin);
+        uint256 winnerId = votingContract.createQuestion("Winner?", block.timestamp + 1, block.timestamp + 1 hours);
+        uint256 drawId = votingContract.createQuestion("Draw?", block.timestamp + 1, block.timestamp + 1 hours);
+        uint256 emptyId = votingContract.createQuestion("Nobody votes?", block.timestamp + 1, block.timestamp + 1 hours);
+        vm.stopPrank();
+        vm.warp(block.timestamp + 2);
+        
+        vm.prank(mp1);
+        votingContract.vote{value: STAKE_AMOUNT}(winnerId, 2);
+        vm.prank(mp1);
+        votingContract.vote{value: STAKE_AMOUNT}(drawId, 0);
+        vm.prank(mp2);
+        votingContract.vote{value: STAKE_AMOUNT}(drawId, 2);
+        
+        vm.warp(block.timestamp + 1 hours);
+        uint256[] memory ids = new uint256[](3);
+        ids[0] = winnerId;
+        ids[1] = drawId;
+        ids[2] = emptyId;
+        vm.prank(admin);
+        votingContract.closeQuestions(ids);
+        
+        (,,,, bool isActive,,,, uint256 winningOption) = votingContract.getQuestionDetails(winnerId);
+        assertFalse(isActive);
+        assertEq(winningOption, 2);
+        assertFalse(votingContract.isQuestionDraw(winnerId));
+        
+        assertTrue(votingContract.isQuestionDraw(drawId));
+        uint256[] memory tiedOptions = votingContract.getTiedOptions(drawId);
+        assertEq(tiedOptions.length, 2);
+        assertEq(tiedOptions[0], 0);
+        assertEq(tiedOptions[1], 2);
+        
+        assertTrue(votingContract.isQuestionDraw(emptyId));
+        assertEq(votingContract.getTiedOptions(emptyId).length, 3);
+        
+        votingContract.closeQuestions(ids);
+        (,,,, isActive,,,, winningOption) = votingContract.getQuestionDetails(winnerId);
+        assertFalse(isActive);
+        assertEq(winningOption, 2);
+        
+        vm.expectRevert("Question already inactive");
+        votingContract.closeQuestion(winnerId);
+    }
+    
+    function testCloseQuestionsSkipsClosedAndDuplicateIds() public {
+        vm.startPrank(admin);
+        uint256 firstId = votingContract.createQuestion("First?", block.timestamp + 1, block.timestamp + 1 hours);
+        uint256 secondId = votingContract.createQuestion("Second?", block.timestamp + 1, block.timestamp + 1 hours);
+        vm.stopPrank();
+        vm.warp(block.timestamp + 2);
+        
+        vm.prank(mp1);
+        votingContract.vote{value: STAKE_AMOUNT}(secondId, 1);
+        
+        vm.warp(block.timestamp + 1 hours);
+        votingContract.closeQuestion(firstId);
+        
+        uint256[] memory ids = new uint256[](3);
+        ids[0] = firstId;
+        ids[1] = secondId;
+        ids[2] = secondId;
+        vm.recordLogs();
+        votingContract.closeQuestions(ids);
+        assertEq(vm.getRecordedLogs().length, 1);
+        
+        (,,,, bool isActive,,,, uint256 winningOption) = votingContract.getQuestionDetails(secondId);
+        assertFalse(isActive);
+        assertEq(winningOption, 1);
+        
+        ids[2] = 3;
+        vm.expectRevert("Invalid question ID");
+        votingContract.closeQuestions(ids);
+    }
+    
     receive() external payable {}
 }
@@ -0,0 +1,64 @@
+"""mpsim.codegen against a small checked-in ABI fixture (test/fixtures/out)."""
+from pathlib import Path
+
+from mpsim import abi, codegen
+
+FIXTURE_OUT = Path(__file__).resolve().parent / "fixtures" / "out"
+VOTER = "0x" + "cd" * 20
+MP_DATA = "(string,string,string,uint256,bool,uint256)"
+
+b = codegen.load_build(FIXTURE_OUT)
+
+
+def test_load_build_leaves_the_checked_in_bindings_alone(tmp_path):
+    before = codegen.BINDINGS_PATH.stat().st_mtime_ns if codegen.BINDINGS_PATH.exists() else None
+    codegen.load_build(FIXTURE_OUT)
+    after = codegen.BINDINGS_PATH.stat().st_mtime_ns if codegen.BINDINGS_PATH.exists() else None
+    assert before == after
+    target = tmp_path / "bindings.py"
+    assert codegen.ensure(FIXTURE_OUT, target)
+    assert not codegen.ensure(FIXTURE_OUT, target)
+    assert codegen.bindings_hash(target) == codegen.artifact_hash(FIXTURE_OUT)
+
+
+def test_selectors_and_topics():
+    assert b.MPVoting.SELECTORS["vote"] == abi.encode_call("vote(uint256,uint256)")[:10]
+    assert b.MPVoting.TOPICS["VoteCast"] == abi.event_topic("VoteCast(uint256,address,uint256,uint256)")
+    assert b.Disperse.disperseEther([VOTER], 5) == abi.encode_call("disperseEther(address[],uint256)", [VOTER], 5)
+
+
+def test_signed_vote_tuple_array_encoder():
+    votes = [b.SignedVote(1, 2, VOTER, b"\x01" * 65), b.SignedVote(2**70, 0, VOTER, b"")]
+    expected = abi.encode_call("voteBatchWithSig((uint256,uint256,address,bytes)[])", [tuple(v) for v in votes])
+    assert b.MPVoting.voteBatchWithSig(votes) == expected
+    assert b.MPVoting.voteBatchWithSig([]) == abi.encode_call("voteBatchWithSig((uint256,uint256,address,bytes)[])", [])
+
+
+def test_mp_data_struct_decoder():
+    values = ("Jane Doe", "Independent", "Somewhere North", 2024, True, 2**40)
+    data = b.MPTokenFactory.decode_getMPTokenData("0x" + abi.encode([MP_DATA], [values]).hex())
+    assert isinstance(data, b.MPData)
+    assert data == values
+    assert (data.name, data.electionYear, data.isActive, data.expirationDate) == ("Jane Doe", 2024, True, 2**40)
+
+
+def test_multiple_outputs_decode_to_named_tuples():
+    data = abi.encode(["uint256", "bool", "bool"], [100 * 10**18, True, False])
+    info = b.MPVoting.decode_getStakeInfo(data)
+    assert (info.staked, info.returned, info.canClaim) == (100 * 10**18, True, False)
+    assert b.MPVoting.decode_questionCount(abi.encode(["uint256"], [7])) == 7
+
+
+def test_decode_log_with_dynamic_array():
+    log = {
+        "topics": [
+            b.MPVoting.TOPICS["QuestionClosedWithDraw"],
+            "0x" + abi.encode(["uint256"], [3]).hex(),
+        ],
+        "data": "0x" + abi.encode(["uint256", "uint256[]"], [4, [0, 2**65]]).hex(),
+    }
+    event = b.MPVoting.decode_log(log)
+    assert isinstance(event, b.MPVoting.QuestionClosedWithDraw)
+    assert (event.questionId, event.totalVotes, list(event.tiedOptions)) == (3, 4, [0, 2**65])
+    assert b.MPToken.decode_log(log) is None
+    assert b.MPVoting.decode_log({"topics": [], "data": "0x"}) is None
@@ -0,0 +1,124 @@
+"""mpsim.eligibility fed with synthetic logs, no node involved."""
+from pathlib import Path
+
+from mpsim import abi, codegen, eligibility
+
+bindings = codegen.load_build(Path(__file__).resolve().parent / "fixtures" / "out")
+
+VOTING = "0x" + "11" * 20
+TOKEN = "0x" + "22" * 20
+MP = "0x" + "aa" * 20
+OTHER = "0x" + "bb" * 20
+EXPIRES = 2_000_000_000
+QUESTION = 1
+START, END = 1_000, 2_000
+
+
+class Node:
+    """Answers the one call Eligibility makes on construction."""
+
+    def call(self, method, *params):
+        assert method == "eth_call"
+        return "0x" + abi.encode(["address"], [TOKEN]).hex()
+
+
+def _word(t, value):
+    return "0x" + abi.encode([t], [value]).hex()
+
+
+def _log(address, contract, name, indexed, types=(), values=()):
+    return {
+        "address": address,
+        "topics": [contract.TOPICS[name]] + [_word(t, v) for t, v in indexed],
+        "data": "0x" + abi.encode(list(types), list(values)).hex(),
+    }
+
+
+def transfer(sender, to, token_id):
+    return _log(TOKEN, bindings.MPToken, "Transfer", [("address", sender), ("address", to), ("uint256", token_id)])
+
+
+def minted(token_id, expires=EXPIRES):
+    return _log(TOKEN, bindings.MPToken, "MPTokenMinted", [("uint256", token_id)],
+                ["string", "string", "string", "uint256"], ["MP", "Party", "Somewhere", expires])
+
+
+def status(token_id, active):
+    return _log(TOKEN, bindings.MPToken, "MPStatusChanged", [("uint256", token_id)], ["bool"], [active])
+
+
+def expired(token_id):
+    return _log(TOKEN, bindings.MPToken, "MPTokenExpired", [("uint256", token_id)], ["string"], ["MP"])
+
+
+def created(question_id, start=START, end=END):
+    return _log(VOTING, bindings.MPVoting, "QuestionCreated", [("uint256", question_id)],
+                ["string", "uint256", "uint256", "address"], ["Question?", start, end, OTHER])
+
+
+def closed(question_id):
+    return _log(VOTING, bindings.MPVoting, "QuestionClosed", [("uint256", question_id)], ["uint256", "uint256"], [0, 0])
+
+
+def roster(*logs):
+    r = eligibility.Eligibility(Node(), VOTING, bindings=bindings)
+    for log in logs:
+        r.apply(log)
+    return r
+
+
+def mint(token_id, owner, expires=EXPIRES):
+    return [transfer(eligibility.ZERO_ADDRESS, owner, token_id), minted(token_id, expires)]
+
+
+def test_mint_then_status_change():
+    r = roster(*mint(1, MP))
+    assert r.is_valid_voter(MP, at=START)
+    r.apply(status(1, False))
+    assert not r.is_valid_voter(MP, at=START)
+    r.apply(status(1, True))
+    assert r.is_valid_voter("0x" + "AA" * 20, at=START)
+    assert not r.is_valid_voter(OTHER, at=START)
+
+
+def test_transfer_moves_eligibility():
+    r = roster(*mint(1, MP), transfer(MP, OTHER, 1))
+    assert not r.is_valid_voter(MP, at=START)
+    assert r.is_valid_voter(OTHER, at=START)
+
+
+def test_burn_and_expired_event():
+    r = roster(*mint(1, MP), *mint(2, MP, expires=EXPIRES + 10))
+    r.apply(transfer(MP, eligibility.ZERO_ADDRESS, 2))
+    r.apply(expired(2))
+    assert r.eligible_until[MP] == EXPIRES
+    assert 2 not in r.owner and 2 not in r.active and 2 not in r.expiration
+    r.apply(transfer(MP, eligibility.ZERO_ADDRESS, 1))
+    r.apply(expired(1))
+    assert MP not in r.eligible_until
+    assert not r.is_valid_voter(MP, at=START)
+
+
+def test_expiry_boundary():
+    r = roster(*mint(1, MP, expires=START + 10), created(QUESTION))
+    assert r.check(QUESTION, 0, MP, at=START + 10) is None
+    assert r.check(QUESTION, 0, MP, at=START + 11) == "Not a valid MP voter"
+
+
+def test_closed_and_unknown_questions():
+    r = roster(*mint(1, MP), created(QUESTION), created(2))
+    r.apply(closed(QUESTION))
+    assert r.check(QUESTION, 0, MP, at=START) == "Question is not active"
+    assert r.check(2, 0, MP, at=START) is None
+    assert r.check(3, 0, MP, at=START) == "Invalid question ID"
+    assert r.check(2, 0, MP, at=START - 1) == "Voting has not started yet"
+    assert r.check(2, 0, MP, at=END + 1) == "Voting has ended"
+
+
+def test_release_makes_a_rejected_vote_retryable():
+    r = roster(*mint(1, MP), created(QUESTION))
+    accepted, rejected = r.filter([(QUESTION, 0, MP)], at=START)
+    assert accepted and not rejected
+    assert r.filter([(QUESTION, 1, MP)], at=START)[1] == [((QUESTION, 1, MP), "Already voted")]
+    r.release(accepted)
+    assert r.filter([(QUESTION, 1, MP)], at=START)[0] == [(QUESTION, 1, MP)]
@@ -0,0 +1,69 @@
+"""mpsim.fastdecode against the generic decoder in mpsim.abi."""
+from mpsim import abi, fastdecode
+
+VAULT = "0x" + "ab" * 20
+VOTER = "0x" + "cd" * 20
+DETAILS = ["string", "string[]", "uint256", "uint256", "bool", "uint256", "address", "uint256", "uint256"]
+STAKE = 100 * 10**18  # over 64 bits
+
+
+def _hex(data):
+    return "0x" + data.hex()
+
+
+def _vote_cast_log(question_id, voter, option, stake):
+    return {
+        "topics": [
+            abi.event_topic("VoteCast(uint256,address,uint256,uint256)"),
+            _hex(abi.encode(["uint256"], [question_id])),
+            _hex(abi.encode(["address"], [voter])),
+        ],
+        "data": _hex(abi.encode(["uint256", "uint256"], [option, stake])),
+    }
+
+
+def test_question_details_round_trip():
+    values = ["Renewable energy funding?", ["Yes", "No", "Abstain"], 100, 2**70, True, 6, VAULT, 6 * STAKE, 2]
+    data = abi.encode(DETAILS, values)
+    assert list(fastdecode.question_details(_hex(data))) == abi.decode(DETAILS, data)
+    assert list(fastdecode.question_details(data)) == values
+
+
+def test_vote_counts_small_and_large():
+    small = abi.encode(["uint256[]"], [[3, 2, 1]])
+    assert list(fastdecode.vote_counts(_hex(small))) == abi.decode(["uint256[]"], small)[0]
+    large = abi.encode(["uint256[]"], [[1, 2**64, 2**255]])
+    assert list(fastdecode.vote_counts(large)) == [1, 2**64, 2**255]
+    assert list(fastdecode.vote_counts(abi.encode(["uint256[]"], [[]]))) == []
+
+
+def test_stake_info_and_check_vote():
+    data = abi.encode(["uint256", "bool", "bool"], [STAKE, True, False])
+    assert tuple(fastdecode.stake_info(_hex(data))) == tuple(abi.decode(["uint256", "bool", "bool"], data))
+    data = abi.encode(["bool", "uint256"], [True, 2])
+    assert fastdecode.check_vote(data) == (True, 2)
+
+
+def test_aggregate3():
+    counts = abi.encode(["uint256[]"], [[4, 0, 2**80]])
+    stake = abi.encode(["uint256", "bool", "bool"], [STAKE, False, True])
+    data = abi.encode(["(bool,bytes)[]"], [[(True, counts), (False, b""), (True, stake)]])
+    results = fastdecode.aggregate3(_hex(data))
+    assert [ok for ok, _ in results] == [True, False, True]
+    assert [bytes(ret) for _, ret in results] == [counts, b"", stake]
+    assert list(fastdecode.vote_counts(results[0][1])) == [4, 0, 2**80]
+    assert fastdecode.stake_info(results[2][1]) == (STAKE, False, True)
+    assert fastdecode.aggregate3(abi.encode(["(bool,bytes)[]"], [[]])) == []
+
+
+def test_vote_cast_logs():
+    logs = [_vote_cast_log(1, VOTER, 0, STAKE), _vote_cast_log(2**65, VAULT, 2, 1)]
+    question_ids, voters, options, stakes = fastdecode.vote_cast_logs(logs)
+    assert list(question_ids) == [1, 2**65]
+    assert voters == [VOTER, VAULT]
+    assert list(options) == [0, 2]
+    assert list(stakes) == [STAKE, 1]
+
+
+def test_vote_cast_logs_empty():
+    assert [list(column) for column in fastdecode.vote_cast_logs([])] == [[], [], [], []]
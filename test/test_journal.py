@@ -0,0 +1,139 @@
+"""Crash recovery in mpsim.journal, against an in-memory stand-in for mpsim.cast."""
+import json
+
+import pytest
+
+from mpsim import cast, journal
+from mpsim.journal import DONE, PLANNED, REJECTED, Journal
+
+SENDER = "0x" + "aa" * 20
+VOTING = "0x" + "11" * 20
+
+
+class Crash(Exception):
+    """The process dying at an inconvenient moment."""
+
+
+class FakeCast:
+    """Signs, mines and answers nonce/receipt queries for one sender."""
+
+    CastError = cast.CastError
+
+    def __init__(self):
+        self.nonce_latest = 0
+        self.receipts = {}
+        self.signed = []
+        self.published = []
+        self.revert_estimation = False
+        self.crash_on_publish = False
+
+    def nonce(self, address, block="pending"):
+        return self.nonce_latest
+
+    def mktx(self, private_key, to, sig, *args, nonce, value=None):
+        if self.revert_estimation:
+            raise cast.CastError("execution reverted: Voting has not started yet")
+        raw = f"0x{sig}:{args}:{nonce}".encode().hex()
+        self.signed.append(raw)
+        return raw
+
+    def keccak(self, data):
+        return "0x" + data[2:18]
+
+    def publish(self, raw):
+        self.published.append(raw)
+        self.mine(self.keccak(raw))
+        if self.crash_on_publish:
+            raise Crash()
+
+    def mine(self, tx_hash, status=1):
+        self.nonce_latest += 1
+        self.receipts[tx_hash] = {"status": hex(status), "blockNumber": "0x5", "gasUsed": "0x5208", "logs": []}
+
+    def receipt(self, tx_hash):
+        return self.receipts.get(tx_hash)
+
+    def wait_for_receipt(self, tx_hash):
+        return self.receipts[tx_hash]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeCast()
+    monkeypatch.setattr(journal, "cast", fake)
+    return fake
+
+
+def _send(j, step="vote", check=None):
+    return j.send(step, "0xkey", SENDER, VOTING, "vote(uint256,uint256)", 1, 0, check=check)
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    good = json.dumps({"step": "deploy", "state": DONE, "result": "0x1234"}) + "\n"
+    path.write_text(good + '{"step":"vote","sta')
+    j = Journal(str(path))
+    assert j.entries == {"deploy": {"step": "deploy", "state": DONE, "result": "0x1234"}}
+    assert path.read_text() == good
+    j.once("schedule", lambda: 42)
+    j.close()
+    assert Journal(str(path)).once("schedule", lambda: 0) == 42
+
+
+def test_rejected_step_is_planned_again(tmp_path, fake):
+    path = str(tmp_path / "journal.jsonl")
+    fake.revert_estimation = True
+    j = Journal(path)
+    assert _send(j)["state"] == REJECTED
+    assert not j.completed("vote")
+    j.close()
+
+    fake.revert_estimation = False
+    j = Journal(path)
+    record = _send(j)
+    assert record["state"] == DONE and record["error"] is None
+    assert len(fake.published) == 1
+
+
+def test_planned_step_is_rebroadcast_while_its_nonce_is_free(tmp_path, fake):
+    path = str(tmp_path / "journal.jsonl")
+    j = Journal(path)
+    j._write("vote", PLANNED, nonce=0, hash=fake.keccak("0xabcdef0123456789"), raw="0xabcdef0123456789")
+    j.close()
+
+    record = _send(Journal(path), check=lambda: pytest.fail("check() consulted while the nonce is free"))
+    assert record["state"] == DONE
+    assert fake.published == ["0xabcdef0123456789"]
+    assert fake.signed == []
+
+
+def test_mined_step_is_picked_up_from_its_receipt(tmp_path, fake):
+    path = str(tmp_path / "journal.jsonl")
+    fake.crash_on_publish = True
+    with pytest.raises(Crash):
+        _send(Journal(path))
+
+    fake.crash_on_publish = False
+    record = _send(Journal(path))
+    assert record["state"] == DONE and record["gasUsed"] == 21000
+    assert len(fake.published) == 1
+
+
+def test_consumed_nonce_falls_back_to_check(tmp_path, fake):
+    path = str(tmp_path / "journal.jsonl")
+    j = Journal(path)
+    j._write("vote", PLANNED, nonce=0, hash="0xlost", raw="0xlost")
+    j.close()
+    fake.nonce_latest = 1  # another transaction took nonce 0
+
+    j = Journal(path)
+    record = _send(j, check=lambda: True)
+    assert record["state"] == DONE and record["reconciled"]
+    assert fake.published == []
+    j.close()
+
+    j = Journal(path, fresh=True)
+    j._write("vote", PLANNED, nonce=0, hash="0xlost", raw="0xlost")
+    record = _send(j, check=lambda: False)
+    assert record["state"] == DONE and record["nonce"] == 1
+    assert len(fake.published) == 1 and fake.published[0] != "0xlost"
@@ -0,0 +1,110 @@
+"""When mpsim.rpc.Client resends a request after the connection failed."""
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from mpsim import rpc
+
+
+class ScriptedNode:
+    """A raw HTTP/1.1 JSON-RPC server that handles each request as its ``script`` says.
+
+    ``answer`` replies with the request's method and keeps the connection open,
+    ``slow`` does the same after a second, ``wrong-id`` answers under another
+    id, ``drop`` closes the connection without replying and ``partial`` sends a
+    status line, then closes it.
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.server.getsockname()[1]}"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            conn, _ = self.server.accept()
+            threading.Thread(target=self._connection, args=(conn,), daemon=True).start()
+
+    def _connection(self, conn):
+        with conn, conn.makefile("rb") as f:
+            try:
+                while self._handle(conn, f):
+                    pass
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _handle(self, conn, f):
+        length = None
+        for line in iter(f.readline, b"\r\n"):
+            if not line:
+                return False
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        request = json.loads(f.read(length))
+        with self.lock:
+            self.requests.append(request["method"])
+            action = self.script.pop(0)
+        if action == "partial":
+            conn.sendall(b"HTTP/1.1 200 OK\r\n")
+        if action == "slow":
+            time.sleep(1)
+        elif action not in ("answer", "wrong-id"):
+            return False
+        reply_id = request["id"] + (action == "wrong-id")
+        body = json.dumps({"jsonrpc": "2.0", "id": reply_id, "result": request["method"]}).encode()
+        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+        return True
+
+
+def test_resends_when_an_idle_connection_was_closed():
+    node = ScriptedNode(["answer", "drop", "answer"])
+    client = rpc.Client(node.url, timeout=5)
+    assert client.call("eth_chainId") == "eth_chainId"
+    assert client.call("eth_sendTransaction", {}) == "eth_sendTransaction"
+    assert node.requests == ["eth_chainId", "eth_sendTransaction", "eth_sendTransaction"]
+    client.close()
+
+
+def test_does_not_resend_after_a_partial_response():
+    node = ScriptedNode(["answer", "partial"])
+    client = rpc.Client(node.url, timeout=5)
+    client.call("eth_chainId")
+    with pytest.raises(ConnectionError):
+        client.call("eth_sendTransaction", {})
+    assert node.requests == ["eth_chainId", "eth_sendTransaction"]
+
+
+def test_does_not_resend_on_a_fresh_connection():
+    node = ScriptedNode(["drop"])
+    client = rpc.Client(node.url, timeout=5)
+    with pytest.raises(ConnectionError):
+        client.call("eth_sendTransaction", {})
+    assert node.requests == ["eth_sendTransaction"]
+
+
+def test_timeout_drops_the_connection():
+    node = ScriptedNode(["slow", "answer"])
+    client = rpc.Client(node.url, timeout=0.2)
+    with pytest.raises(TimeoutError):
+        client.call("eth_sendTransaction", {})
+    # the late reply must not be read as the answer to the next request
+    assert client.call("eth_chainId") == "eth_chainId"
+    assert node.requests == ["eth_sendTransaction", "eth_chainId"]
+    client.close()
+
+
+def test_rejects_a_reply_to_another_request():
+    node = ScriptedNode(["wrong-id", "answer"])
+    client = rpc.Client(node.url, timeout=5)
+    with pytest.raises(ConnectionError, match="do not match"):
+        client.call("eth_chainId")
+    assert client.call("eth_blockNumber") == "eth_blockNumber"
+    client.close()
@@ -0,0 +1,74 @@
+"""mpsim.secp256k1 and the EIP-712 vote hashing in mpsim.relayer."""
+import hashlib
+
+from mpsim import abi, relayer, secp256k1
+from mpsim.config import ADMIN_ADDRESS, VOTERS
+from mpsim.keccak import keccak256
+
+ANVIL_ADMIN_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+VOTING = "0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512"
+
+
+def test_to_address_matches_anvil_accounts():
+    assert secp256k1.to_address(ANVIL_ADMIN_KEY) == ADMIN_ADDRESS.lower()
+    for key, address, _ in VOTERS:
+        assert secp256k1.to_address(key) == address.lower()
+
+
+def test_sign_recover_round_trip_with_low_s():
+    for i, (key, address, _) in enumerate(VOTERS):
+        digest = hashlib.sha256(bytes([i])).digest()
+        v, r, s = secp256k1.sign(key, digest)
+        assert v in (27, 28)
+        assert 0 < s <= secp256k1.N // 2
+        assert secp256k1.sign(key, digest) == (v, r, s)
+        assert secp256k1.recover(digest, v, r, s) == address.lower()
+        assert secp256k1.recover(keccak256(digest), v, r, s) != address.lower()
+        signature = secp256k1.signature_bytes(v, r, s)
+        assert len(signature) == 65 and signature[64] == v
+
+
+def test_eip712_spec_mail_vector():
+    # the "Ether Mail" example from the EIP-712 specification
+    domain = keccak256(abi.encode(
+        ["bytes32", "bytes32", "bytes32", "uint256", "address"],
+        [relayer.DOMAIN_TYPEHASH, keccak256("Ether Mail"), keccak256("1"), 1, "0xCcCCccccCCCCcCCCCCCcCcCccCcCCCcCcccccccC"],
+    ))
+    person_type = keccak256("Person(string name,address wallet)")
+    mail_type = keccak256("Mail(Person from,Person to,string contents)Person(string name,address wallet)")
+
+    def person(name, wallet):
+        return keccak256(abi.encode(["bytes32", "bytes32", "address"], [person_type, keccak256(name), wallet]))
+
+    mail = keccak256(abi.encode(["bytes32"] * 4, [
+        mail_type,
+        person("Cow", "0xCD2a3d9F938E13CD947Ec05AbC7FE734Df8DD826"),
+        person("Bob", "0xbBbBBBBbbBBBbbbBbbBbbbbBBbBbbbbBbBbbBBbB"),
+        keccak256("Hello, Bob!"),
+    ]))
+    digest = keccak256(b"\x19\x01" + domain + mail)
+    assert digest.hex() == "be609aee343fb3c4b28e1df9e632fca64fcfaede20f02e86244efddf30957bd2"
+
+    key = int.from_bytes(keccak256("cow"), "big")
+    assert secp256k1.sign(key, digest) == (
+        28,
+        0x4355c47d63924e8a72e509b65029052eb6c299d53a04e167c5775fd466751c9d,
+        0x07299936d304c153f6443dfa05f40ff007d72911b6f72307f996231605b91562,
+    )
+    assert secp256k1.to_address(key) == "0xcd2a3d9f938e13cd947ec05abc7fe734df8dd826"
+
+
+def test_vote_digest_vector():
+    domain = relayer.domain_separator(31337, VOTING)
+    assert domain.hex() == "0c104b6334334222a15385eabd1dd7e0282d5c290964a7bae24e7b28de6f010b"
+    key, voter, _ = VOTERS[0]
+    digest = relayer.vote_digest(domain, 1, 2, voter)
+    assert digest.hex() == "b29ad14a8bbd3e720fa85372ee32c2139c4502bd0801f3376333d8c9560563d6"
+    signature = relayer.sign_vote(key, domain, 1, 2, voter)
+    assert signature.hex() == (
+        "37546ad1aa0027a0a89367aaee231bf61348177c043d1f1c41c5bd8b30247eee"
+        "5c17ff2290baa30aca6e1981f365d9631effc62cc9be12743dccdc155e436d56"
+        "1b"
+    )
+    r, s, v = int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:64], "big"), signature[64]
+    assert secp256k1.recover(digest, v, r, s) == voter.lower()
@@ -0,0 +1,102 @@
+"""Startup budget of the Python tooling.
+
+Runs ``python -X importtime -m mpsim tallies`` against a stub JSON-RPC server
+and fails if the first request arrives later than ``MPSIM_STARTUP_BUDGET_MS``
+(default 100) after the process was started, or if the command imported any of
+the modules that short commands are meant to skip.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from mpsim import abi
+
+ROOT = Path(__file__).resolve().parents[1]
+BUDGET_MS = float(os.environ.get("MPSIM_STARTUP_BUDGET_MS", 100))
+VOTING = "0x" + "11" * 20
+HEAVY = {"http.client", "ssl", "sqlite3", "numpy", "concurrent.futures", "subprocess", "mpsim.codegen", "mpsim.bindings"}
+
+DETAILS = ["string", "string[]", "uint256", "uint256", "bool", "uint256", "address", "uint256", "uint256"]
+RESULTS = {
+    abi.encode_call("questionCount()"): abi.encode(["uint256"], [2]),
+    abi.encode_call("getQuestionDetails(uint256)", 1): abi.encode(
+        DETAILS, ["First?", ["Yes", "No", "Abstain"], 0, 10, False, 6, VOTING, 0, 0]),
+    abi.encode_call("getQuestionDetails(uint256)", 2): abi.encode(
+        DETAILS, ["Second?", ["Yes", "No", "Abstain"], 0, 10, True, 1, VOTING, 0, 0]),
+    abi.encode_call("getAllVoteCounts(uint256)", 1): abi.encode(["uint256[]"], [[3, 2, 1]]),
+    abi.encode_call("getAllVoteCounts(uint256)", 2): abi.encode(["uint256[]"], [[0, 1, 0]]),
+}
+
+
+class StubNode(BaseHTTPRequestHandler):
+    first_request = None
+
+    def do_POST(self):
+        if StubNode.first_request is None:
+            StubNode.first_request = time.monotonic()
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(request, list):
+            reply = [self._answer(r) for r in request]
+        else:
+            reply = self._answer(request)
+        body = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _answer(self, request):
+        assert request["method"] == "eth_call"
+        return {"jsonrpc": "2.0", "id": request["id"], "result": "0x" + RESULTS[request["params"][0]["data"]].hex()}
+
+    def log_message(self, *args):
+        pass
+
+
+def _imports(stderr):
+    """``{module: cumulative microseconds}`` from ``-X importtime`` output."""
+    out = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                out[name.strip()] = int(cumulative)
+    return out
+
+
+def test_tallies_first_rpc_within_budget():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubNode)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        env = {**os.environ, "PYTHONPATH": str(ROOT)}
+        # warm the bytecode cache so the measured run does not pay for compiling
+        cmd = [sys.executable, "-X", "importtime", "-m", "mpsim", "tallies",
+               "--rpc-url", f"http://127.0.0.1:{server.server_port}", "--voting", VOTING]
+        subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, check=True)
+        StubNode.first_request = None
+        started = time.monotonic()
+        proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "Yes: 3   No: 2   Abstain: 1" in proc.stdout
+    assert "Question 2 (open): Second?" in proc.stdout
+
+    imports = _imports(proc.stderr)
+    slowest = ", ".join(f"{name} {us / 1000:.1f}ms" for name, us in sorted(imports.items(), key=lambda kv: -kv[1])[:8])
+    heavy = sorted(HEAVY & imports.keys())
+    assert not heavy, f"tallies imported {heavy}; slowest imports: {slowest}"
+
+    elapsed_ms = (StubNode.first_request - started) * 1000
+    assert elapsed_ms <= BUDGET_MS, (
+        f"first RPC after {elapsed_ms:.0f}ms (budget {BUDGET_MS:.0f}ms, MPSIM_STARTUP_BUDGET_MS); "
+        f"slowest imports: {slowest}"
+    )